@@ -0,0 +1,88 @@
+// assets/live_updates.js
+// Keeps one server-sent events connection per tab for live quotes and fired alerts.
+// The subscription is rebuilt whenever the watchlist, auto-trades or price alerts change.
+// When the worker has no stream slots left (/stream answers 503) the tab polls /quotes instead,
+// asking only for quotes changed since the last poll's version.
+const LIVE_POLL_MS = 15000;  // POLL_CLIENT_INTERVAL in utils/quote_hub.py
+
+function applyQuotes(quotes) {
+    // Only quotes that actually moved reach Dash; an unchanged poll fires no callbacks.
+    const changed = Object.keys(quotes || {}).filter(function(ticker) {
+        return JSON.stringify(window._liveQuotes[ticker]) !== JSON.stringify(quotes[ticker]);
+    });
+    if (!changed.length) {
+        return;
+    }
+    changed.forEach(function(ticker) { window._liveQuotes[ticker] = quotes[ticker]; });
+    window.dash_clientside.set_props('live-quotes-store', {data: Object.assign({}, window._liveQuotes)});
+}
+
+function startPolling(query) {
+    let version = 0;
+    const poll = function() {
+        fetch('/quotes?' + query + '&since=' + version)
+            .then(function(resp) { return resp.ok ? resp.json() : null; })
+            .then(function(body) {
+                if (!body) { return; }
+                version = body.version || version;
+                applyQuotes(body.quotes);
+                if (body.trigger) {
+                    window.dash_clientside.set_props('live-trigger-store', {data: body.trigger});
+                }
+            })
+            .catch(function() {});
+    };
+    poll();
+    window._livePoll = setInterval(poll, LIVE_POLL_MS);
+}
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    live: {
+        subscribe: function(watchlist, autoTrades, priceAlerts) {
+            autoTrades = autoTrades || {};
+            priceAlerts = priceAlerts || {};
+            const tickers = Array.from(new Set([
+                ...(watchlist || []), ...Object.keys(autoTrades), ...Object.keys(priceAlerts)
+            ])).sort();
+            const params = new URLSearchParams({
+                tickers: tickers.join(','),
+                rules: JSON.stringify({auto_trades: autoTrades, price_alerts: priceAlerts})
+            });
+            const query = params.toString();
+            const url = '/stream?' + query;
+
+            if (window._liveUrl === url) {
+                return url;
+            }
+            if (window._liveSource) {
+                window._liveSource.close();
+                window._liveSource = null;
+            }
+            if (window._livePoll) {
+                clearInterval(window._livePoll);
+                window._livePoll = null;
+            }
+            window._liveUrl = url;
+            window._liveQuotes = window._liveQuotes || {};
+            if (!tickers.length) {
+                return url;
+            }
+
+            const source = new EventSource(url);
+            source.addEventListener('quotes', function(e) {
+                applyQuotes(JSON.parse(e.data));
+            });
+            source.addEventListener('trigger', function(e) {
+                window.dash_clientside.set_props('live-trigger-store', {data: JSON.parse(e.data)});
+            });
+            source.onerror = function() {
+                // A non-200 answer (503 when stream slots are exhausted) closes the source for good.
+                if (source.readyState === EventSource.CLOSED && window._liveSource === source) {
+                    window._liveSource = null;
+                    startPolling(query);
+                }
+            };
+            window._liveSource = source;
+            return url;
+        }
+    }
+});
@@ -0,0 +1,349 @@
+# loadtest.py
+"""
+Load generator for the Dash callback endpoint (/_dash-update-component).
+
+Simulates many concurrent sessions issuing a realistic mix of callbacks against a
+stub data provider and reports p50/p95/p99 latency and throughput per callback.
+
+    # In-process against the Flask test client
+    python loadtest.py --sessions 50 --duration 30
+
+    # Against gunicorn on localhost, once per workers x threads configuration
+    python loadtest.py --gunicorn 1x8,2x8,4x16 --sessions 100 --duration 30
+
+    # Against an already running server
+    python loadtest.py --url http://127.0.0.1:8050 --sessions 50
+
+    # Every session also holds its /stream (SSE) connection open, like a real tab
+    python loadtest.py --gunicorn 1x8 --sessions 50 --streams
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import numpy as np
+
+TICKERS = ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS', 'SBIN.NS', 'ITC.NS', 'LT.NS']
+POLL_SECONDS = 15  # matches LIVE_POLL_MS in assets/live_updates.js
+
+# Relative weights of each callback in the traffic mix (roughly what an open tab generates).
+DEFAULT_MIX = {
+    'update_dashboard': 10,
+    'update_ai_section': 10,
+    'update_price_chart': 10,
+    'update_news_tab': 3,
+    'run_stock_screener': 2,
+    'update_watchlist_display': 45,
+    'background_engine': 25,
+    'add_funds_to_wallet': 8,
+}
+
+# Output fragment that identifies each callback in /_dash-dependencies.
+CALLBACK_OUTPUTS = {
+    'update_dashboard': 'dashboard-content.children',
+    'update_ai_section': 'ai-section.children',
+    'update_price_chart': 'price-chart.figure',
+    'update_news_tab': 'news-content.children',
+    'run_stock_screener': 'recommendations-table-container.children',
+    'update_watchlist_display': 'watchlist-container.children',
+    'background_engine': 'autotrade-alert-placeholder.children',
+    'add_funds_to_wallet': 'add-funds-alert-placeholder.children',
+}
+
+def stub_environment():
+    """ Environment for the app under test: fake provider with injected latency, and optionally a different governor limit. """
+    env = dict(os.environ)
+    env["STOCKSAARTHI_PROVIDER"] = "fake"  # never send load-test traffic to the real provider
+    env["FAKE_PROVIDER_LATENCY"] = str(ARGS.provider_latency)
+    if ARGS.upstream_rate is not None:
+        env["UPSTREAM_RATE"] = str(ARGS.upstream_rate)
+        env["UPSTREAM_BURST"] = str(max(int(ARGS.upstream_rate), 1))
+    return env
+
+class SessionState:
+    """ Client-side stores of one simulated tab, updated from callback responses. """
+    def __init__(self, rng):
+        self.rng = rng
+        self.ticker = rng.choice(TICKERS)
+        self.balance = 1000000.0
+        self.wallet_hist = []
+        self.watchlist = rng.sample(TICKERS, rng.randint(1, 5))
+
+    def inputs_for(self, name):
+        """ Input and state values, in dependency order, for the next call to `name`. """
+        rng = self.rng
+        if name == 'update_dashboard':
+            self.ticker = rng.choice(TICKERS)
+            return [1], [self.ticker]
+        if name == 'update_ai_section':
+            return [self.ticker], []
+        if name == 'update_price_chart':
+            return [rng.choice(['5m', '15m', '1h', '1d', '1w']), []], [self.ticker]
+        if name == 'update_news_tab':
+            return ['tab-news'], [self.ticker, None]
+        if name == 'run_stock_screener':
+            return [1], []
+        if name == 'update_watchlist_display':
+            quotes = {t: {'price': round(rng.uniform(100, 3000), 2), 'change': 1.0, 'change_pct': 0.1} for t in self.watchlist}
+            return [quotes, self.watchlist], []
+        if name == 'background_engine':
+            ticker = rng.choice(TICKERS)
+            trigger = {'prices': {ticker: 100.0}, 'at': time.time()}
+            auto_trades = {ticker: {'type': 'BUY', 'target': 150.0}}
+            alerts = {ticker: {'upper': 500.0, 'lower': 120.0}}
+            return [trigger], [auto_trades, alerts, self.balance, {}, [], list(self.wallet_hist)]
+        if name == 'add_funds_to_wallet':
+            return [1], [rng.choice([1000, 5000, 50000]), self.balance, list(self.wallet_hist)]
+        raise ValueError(name)
+
+def load_dependencies(transport):
+    status, body = transport('GET', '/_dash-dependencies', None)
+    if status != 200:
+        raise SystemExit(f"Could not read callback dependencies (HTTP {status}).")
+    deps = {}
+    for name, fragment in CALLBACK_OUTPUTS.items():
+        match = next((d for d in json.loads(body) if fragment in d['output']), None)
+        if match is None:
+            raise SystemExit(f"No callback with output {fragment} is registered.")
+        deps[name] = match
+    return deps
+
+def _outputs(output):
+    specs = [o for o in output.strip('.').split('...')] if output.startswith('..') else [output]
+    parsed = [dict(zip(('id', 'property'), spec.split('.', 1))) for spec in specs]
+    return parsed if output.startswith('..') else parsed[0]
+
+def build_payload(dep, inputs, state):
+    return {
+        'output': dep['output'],
+        'outputs': _outputs(dep['output']),
+        'inputs': [{'id': i['id'], 'property': i['property'], 'value': v} for i, v in zip(dep['inputs'], inputs)],
+        'state': [{'id': s['id'], 'property': s['property'], 'value': v} for s, v in zip(dep['state'], state)],
+        'changedPropIds': [f"{dep['inputs'][0]['id']}.{dep['inputs'][0]['property']}"],
+    }
+
+def in_process_transport():
+    """ Sends requests straight into the Flask app; one test client per thread. """
+    for key, value in stub_environment().items():
+        os.environ[key] = value
+    from app import server
+    local = threading.local()
+
+    def send(method, path, payload):
+        if not hasattr(local, 'client'):
+            local.client = server.test_client()
+        resp = local.client.open(path, method=method, json=payload)
+        return resp.status_code, resp.get_data()
+
+    def open_stream(path):
+        resp = server.test_client().get(path, buffered=False)
+        return resp.status_code, (line for chunk in resp.response for line in chunk.splitlines())
+    send.open_stream = open_stream
+    return send
+
+def http_transport(base_url):
+    def open_stream(path):
+        try:
+            resp = urllib.request.urlopen(base_url + path, timeout=60)
+        except urllib.error.HTTPError as e:
+            return e.code, iter(())
+        except OSError:
+            return 0, iter(())
+        return resp.status, iter(resp.readline, b'')
+
+    def send(method, path, payload):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=120) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except OSError as e:
+            return 0, str(e).encode()
+    send.open_stream = open_stream
+    return send
+
+def hold_stream(transport, state, deadline, record, streams):
+    """
+    Keeps the session's /stream connection open until the deadline, like an open tab.
+    If the server refuses it (503, no stream slots left) the session polls /quotes instead,
+    as live_updates.js does, and those polls are recorded like any other request.
+    """
+    query = urllib.parse.urlencode({'tickers': ','.join(sorted(state.watchlist)), 'rules': '{}'})
+    status, lines = transport.open_stream('/stream?' + query)
+    streams.count('opened' if status == 200 else 'refused')
+    if status == 200:
+        for line in lines:
+            if line.startswith(b'event:'):
+                streams.count('events')
+            if time.perf_counter() >= deadline:
+                return
+        return
+    version = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        poll_status, body = transport('GET', f'/quotes?{query}&since={version}', None)
+        record('poll_quotes', time.perf_counter() - started, poll_status == 200)
+        if poll_status == 200:
+            version = json.loads(body).get('version', version)
+        time.sleep(POLL_SECONDS)
+
+class StreamStats:
+    def __init__(self):
+        self.counts = {'opened': 0, 'refused': 0, 'events': 0}
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+def run_load(transport, sessions, duration, mix, seed, streams=False):
+    deps = load_dependencies(transport)
+    names, weights = zip(*mix.items())
+    results = {name: [] for name in names + ('poll_quotes',)}   # (latency seconds, ok)
+    stream_stats = StreamStats()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def record(name, elapsed, ok):
+        with lock:
+            results[name].append((elapsed, ok))
+
+    def session_loop(sid):
+        rng = random.Random(seed + sid)
+        state = SessionState(rng)
+        if streams:
+            threading.Thread(target=hold_stream, args=(transport, state, deadline, record, stream_stats), daemon=True).start()
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            inputs, states = state.inputs_for(name)
+            started = time.perf_counter()
+            status, body = transport('POST', '/_dash-update-component', build_payload(deps[name], inputs, states))
+            elapsed = time.perf_counter() - started
+            ok = status in (200, 204)
+            if ok and status == 200 and name == 'add_funds_to_wallet':
+                response = json.loads(body).get('response', {})
+                state.balance = response.get('wallet-balance-store', {}).get('data', state.balance)
+                state.wallet_hist = response.get('wallet-history-store', {}).get('data', state.wallet_hist)[-20:]
+            record(name, elapsed, ok)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session_loop, args=(i,), daemon=True) for i in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - started, stream_stats.counts if streams else None
+
+def summarize(results, wall, streams=None):
+    rows = []
+    for name, samples in results.items():
+        if not samples:
+            continue
+        latencies = np.array([s[0] for s in samples]) * 1000
+        rows.append({
+            'callback': name, 'requests': len(samples), 'errors': sum(not s[1] for s in samples),
+            'rps': round(len(samples) / wall, 2),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 1),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 1),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 1),
+        })
+    total = sum(r['requests'] for r in rows)
+    report = {'wall_seconds': round(wall, 2), 'total_requests': total, 'total_rps': round(total / wall, 2), 'callbacks': rows}
+    if streams is not None:
+        report['streams'] = dict(streams)
+    return report
+
+def print_report(label, report):
+    print(f"\n=== {label}: {report['total_requests']} requests in {report['wall_seconds']}s ({report['total_rps']} req/s) ===")
+    print(f"{'callback':<26}{'reqs':>7}{'errs':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in report['callbacks']:
+        print(f"{r['callback']:<26}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+    if 'streams' in report:
+        s = report['streams']
+        print(f"streams: {s['opened']} held open, {s['refused']} refused (polling /quotes), {s['events']} events received")
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def run_gunicorn_config(workers, threads):
+    port = _free_port()
+    cmd = [sys.executable, '-m', 'gunicorn', 'app:server', '-w', str(workers), '--threads', str(threads),
+           '--worker-class', 'gthread', '-b', f'127.0.0.1:{port}', '--timeout', '300', '--graceful-timeout', '5', '--log-level', 'warning']
+    env = stub_environment()
+    env["GUNICORN_THREADS"] = str(threads)  # sizes the per-worker stream cap the way the Procfile does
+    proc = subprocess.Popen(cmd, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    transport = http_transport(f'http://127.0.0.1:{port}')
+    try:
+        for _ in range(120):
+            if transport('GET', '/_dash-dependencies', None)[0] == 200:
+                break
+            if proc.poll() is not None:
+                raise SystemExit(f"gunicorn exited with code {proc.returncode}.")
+            time.sleep(0.5)
+        return run_load(transport, ARGS.sessions, ARGS.duration, ARGS.mix, ARGS.seed, ARGS.streams)
+    finally:
+        proc.terminate()  # held streams never finish on their own, so don't wait out a long graceful shutdown
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, (text or '').split(',')):
+        name, weight = part.split('=')
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown callback '{name}'. Choose from {list(DEFAULT_MIX)}.")
+        mix[name] = float(weight)
+    return {k: v for k, v in mix.items() if v > 0}
+
+def main():
+    global ARGS
+    parser = argparse.ArgumentParser(description="Load-test the Dash callback endpoint.")
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent simulated sessions")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run each configuration")
+    parser.add_argument("--mix", help="Override traffic weights, e.g. run_stock_screener=0,background_engine=40")
+    parser.add_argument("--url", help="Target an already running server instead of the in-process app")
+    parser.add_argument("--gunicorn", help="Comma-separated WORKERSxTHREADS configs to launch on localhost, e.g. 1x8,4x8")
+    parser.add_argument("--upstream-rate", type=float, default=None,
+                        help="Override the governor rate limit (defaults to the app's production UPSTREAM_RATE)")
+    parser.add_argument("--provider-latency", type=float, default=0.05, help="Seconds of latency the stub provider adds per call")
+    parser.add_argument("--streams", action="store_true", help="Each session also holds its /stream connection open")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    ARGS = parser.parse_args()
+    ARGS.mix = parse_mix(ARGS.mix)
+
+    reports = {}
+    if ARGS.gunicorn:
+        for config in ARGS.gunicorn.split(','):
+            workers, threads = (int(x) for x in config.lower().split('x'))
+            results, wall, streams = run_gunicorn_config(workers, threads)
+            reports[f"gunicorn {workers} workers x {threads} threads"] = summarize(results, wall, streams)
+    else:
+        transport = http_transport(ARGS.url.rstrip('/')) if ARGS.url else in_process_transport()
+        results, wall, streams = run_load(transport, ARGS.sessions, ARGS.duration, ARGS.mix, ARGS.seed, ARGS.streams)
+        reports[ARGS.url or "in-process"] = summarize(results, wall, streams)
+
+    if ARGS.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for label, report in reports.items():
+            print_report(label, report)
+
+if __name__ == '__main__':
+    main()
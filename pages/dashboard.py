@@ -4,13 +4,20 @@ from dash import dcc, html, callback, Input, Output, State, ctx
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import yfinance as yf
 import pandas as pd
 from utils.data_handler import (
     fetch_stock_data, get_key_metrics, calculate_technical_indicators,
     fetch_news, fetch_corporate_actions
 )
 from utils.ml_model import train_and_predict_svr, generate_recommendation
+from utils.snapshot import get_snapshot_recommendation
+from utils.bar_store import get_bars
+from utils.similarity import find_similar_stocks
+
+CHART_RESOLUTIONS = [
+    {'label': '5m', 'value': '5m'}, {'label': '15m', 'value': '15m'}, {'label': '1h', 'value': '1h'},
+    {'label': '1D', 'value': '1d'}, {'label': '1W', 'value': '1w'},
+]
 
 dash.register_page(__name__, path='/', name='Dashboard')
 
@@ -20,9 +27,41 @@ def create_metric_card(label, value, class_name=""):
         html.H5(value, className=f"fw-bold {class_name}")
     ])), md=4)
 
+def build_price_figure(bars, predictions_df, resolution):
+    fig = go.Figure(data=[go.Candlestick(x=bars.index, open=bars['Open'], high=bars['High'], low=bars['Low'], close=bars['Close'], name='Price')])
+    # The forecast is daily, so only overlay it on daily or coarser charts.
+    if predictions_df is not None and not predictions_df.empty and resolution in ('1d', '1w'):
+        fig.add_trace(go.Scatter(x=predictions_df['Date'], y=predictions_df['Predicted_Close'], mode='lines', name='AI Forecast', line=dict(color='#3498DB', width=2, dash='dash')))
+    fig.update_layout(title="Price Chart & AI Forecast", template="plotly_white", xaxis_rangeslider_visible=False, legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+    if resolution not in ('1d', '1w'):
+        fig.update_xaxes(rangebreaks=[dict(bounds=["sat", "mon"]), dict(bounds=[15.5, 9.25], pattern="hour")])
+    return fig
+
+def build_indicator_figure(bars_tech):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08, subplot_titles=("RSI (14)", "MACD"))
+    fig.add_trace(go.Scatter(x=bars_tech.index, y=bars_tech['RSI'], name='RSI', line=dict(color='#8E44AD')), row=1, col=1)
+    fig.add_hline(y=70, line_dash="dot", line_color="gray", row=1, col=1)
+    fig.add_hline(y=30, line_dash="dot", line_color="gray", row=1, col=1)
+    fig.add_trace(go.Scatter(x=bars_tech.index, y=bars_tech['MACD'], name='MACD', line=dict(color='#3498DB')), row=2, col=1)
+    fig.add_trace(go.Scatter(x=bars_tech.index, y=bars_tech['Signal_Line'], name='Signal', line=dict(color='#E67E22')), row=2, col=1)
+    fig.add_trace(go.Bar(x=bars_tech.index, y=bars_tech['MACD_Hist'], name='Histogram', marker_color=['#2ECC71' if v >= 0 else '#E74C3C' for v in bars_tech['MACD_Hist']]), row=2, col=1)
+    fig.update_layout(template="plotly_white", height=500, showlegend=False)
+    return fig
+
+def build_similar_section(similar):
+    if not similar:
+        body = html.P("Similar stocks appear once the similarity index has been built (run precompute.py).", className="text-muted small mb-0")
+    else:
+        body = dbc.ListGroup([
+            dbc.ListGroupItem([html.Span(t, className="fw-bold"), html.Span(f"Correlation {corr:+.2f}", className="text-muted small float-end")])
+            for t, corr, _ in similar
+        ], flush=True)
+    return dbc.Card(dbc.CardBody([html.H5("Similar Stocks", className="mb-3"), body]), className="mb-4")
+
 layout = dbc.Container(fluid=True, children=[
     dcc.Store(id='current-ticker-store'),
     dcc.Store(id='current-recommendation-store'),
+    dcc.Store(id='current-forecast-store'),
     html.H2("AI Stock Analysis Dashboard", className="text-center mb-4"),
     dbc.Row(justify="center", children=[
         dbc.Col(lg=6, md=8, children=[
@@ -33,7 +72,8 @@ layout = dbc.Container(fluid=True, children=[
         ])
     ]),
     html.Div(id="alert-placeholder", className="mt-3"),
-    dcc.Loading(html.Div(id="dashboard-content", className="mt-4")),
+    # Only spin for the main render; the sections inside have their own loaders.
+    dcc.Loading(html.Div(id="dashboard-content", className="mt-4"), target_components={"dashboard-content": "children"}),
     
     # Modals
     dbc.Modal([
@@ -51,11 +91,12 @@ layout = dbc.Container(fluid=True, children=[
     ], id="alert-modal", is_open=False),
 ])
 
-# MAIN CALLBACK TO RENDER DASHBOARD (BUG-FIXED)
+# MAIN CALLBACK: only info + history, so the header, metrics and candlestick appear as soon as they arrive.
+# The AI recommendation, similar stocks and each tab fill in from their own callbacks below.
 @callback(
     [Output("dashboard-content", "children"),
      Output("current-ticker-store", "data"),
-     Output("current-recommendation-store", "data"),
+     Output("current-forecast-store", "data"),
      Output("alert-placeholder", "children")],
     Input("analyze-button", "n_clicks"),
     State("stock-ticker-input", "value"),
@@ -70,13 +111,7 @@ def update_dashboard(n_clicks, ticker):
     if stock_data is None:
         return dash.no_update, dash.no_update, dash.no_update, dbc.Alert(f"Could not retrieve data for '{ticker.upper()}'. Please check the ticker symbol and try again.", color="danger")
     
-    # --- Data Processing and Figure Generation ---
-    stock_data_tech = calculate_technical_indicators(stock_data.copy())
-    news = fetch_news(ticker.upper())
-    dividends, splits = fetch_corporate_actions(ticker.upper())
     metrics, change_color_class = get_key_metrics(stock_info, stock_data)
-    predictions_df = train_and_predict_svr(stock_data)
-    reco = generate_recommendation(stock_data, predictions_df)
     
     # --- UI Components ---
     header_section = html.Div([
@@ -90,6 +125,49 @@ def update_dashboard(n_clicks, ticker):
         ], className="mt-3 g-2")
     ], className="mb-4")
 
+    metrics_section = dbc.Row([
+        create_metric_card(label, value, change_color_class if label == "Price Change" else "")
+        for label, value in metrics.items()
+    ], className="mb-4 g-3")
+
+    # --- Charts are drawn by update_price_chart so the resolution can change without re-analysis ---
+    tabs_section = dbc.Tabs(id="dashboard-tabs", active_tab="tab-price", children=[
+        dbc.Tab(label="Price Chart", tab_id="tab-price", children=[
+            dbc.RadioItems(id="chart-resolution", options=CHART_RESOLUTIONS, value='1d', inline=True, className="mt-3"),
+            dcc.Loading(dcc.Graph(id="price-chart")),
+        ]),
+        dbc.Tab(label="Technical Indicators", tab_id="tab-indicators", children=dcc.Loading(dcc.Graph(id="indicators-chart"))),
+        dbc.Tab(label="News", tab_id="tab-news", children=dcc.Loading(html.Div(id="news-content"))),
+        dbc.Tab(label="Corporate Actions", tab_id="tab-actions", children=dcc.Loading(html.Div(id="actions-content"))),
+    ])
+
+    layout = html.Div([
+        header_section,
+        metrics_section,
+        dcc.Loading(html.Div(id="ai-section", className="mb-4")),
+        html.Div(id="similar-section"),
+        tabs_section,
+    ])
+    return layout, ticker.upper(), None, None # Clear the previous forecast and any previous alerts
+
+@callback(
+    [Output("ai-section", "children"),
+     Output("current-recommendation-store", "data"),
+     Output("current-forecast-store", "data", allow_duplicate=True)],
+    Input("current-ticker-store", "data"),
+    prevent_initial_call=True
+)
+def update_ai_section(ticker):
+    if not ticker:
+        return dash.no_update, dash.no_update, dash.no_update
+    reco, predictions_df = get_snapshot_recommendation(ticker)
+    if reco is None:
+        stock_data, _ = fetch_stock_data(ticker)
+        if stock_data is None:
+            return html.P("AI recommendation unavailable.", className="text-muted"), None, []
+        predictions_df = train_and_predict_svr(stock_data, ticker=ticker)
+        reco = generate_recommendation(stock_data, predictions_df)
+
     ai_section = dbc.Card(dbc.CardBody([
         html.H4("AI Recommendation", className="text-center mb-4"),
         dbc.Row(justify="center", align="center", children=[
@@ -103,20 +181,80 @@ def update_dashboard(n_clicks, ticker):
             dbc.Col(dbc.Switch(id="autotrade-switch", value=False, label="Auto-Trade"), width="auto"),
             html.Div(id="autotrade-status-output", className="small text-muted text-center mt-2")
         ])
-    ]), className="mb-4")
+    ]))
+    forecast = predictions_df.assign(Date=predictions_df['Date'].astype(str)).to_dict('records') if not predictions_df.empty else []
+    return ai_section, reco, forecast
 
-    # --- Plotly Figures ---
-    fig_price = go.Figure(data=[go.Candlestick(x=stock_data.index, open=stock_data['Open'], high=stock_data['High'], low=stock_data['Low'], close=stock_data['Close'], name='Price')])
-    if not predictions_df.empty:
-        fig_price.add_trace(go.Scatter(x=predictions_df['Date'], y=predictions_df['Predicted_Close'], mode='lines', name='AI Forecast', line=dict(color='#3498DB', width=2, dash='dash')))
-    fig_price.update_layout(title="Price Chart & AI Forecast", template="plotly_white", legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
-    
-    # ... (other figures for RSI, MACD are the same) ...
+@callback(
+    Output("similar-section", "children"),
+    Input("current-ticker-store", "data"),
+    prevent_initial_call=True
+)
+def update_similar_section(ticker):
+    if not ticker:
+        return dash.no_update
+    stock_data, _ = fetch_stock_data(ticker)
+    return build_similar_section(find_similar_stocks(ticker, stock_data))
 
-    tabs_section = dbc.Tabs([...]) # As before, but ensure light theme
-    
-    layout = html.Div([header_section, ai_section, tabs_section])
-    return layout, ticker.upper(), reco, None # Clear any previous alerts
+@callback(
+    Output("price-chart", "figure"),
+    [Input("chart-resolution", "value"),
+     Input("current-forecast-store", "data")],
+    State("current-ticker-store", "data"),
+)
+def update_price_chart(resolution, forecast, ticker):
+    if not ticker or not resolution:
+        return dash.no_update
+    bars = get_bars(ticker, resolution)
+    if bars.empty:
+        return go.Figure().update_layout(template="plotly_white", title=f"No {resolution} data available for {ticker}.")
+    predictions_df = pd.DataFrame(forecast or [], columns=['Date', 'Predicted_Close'])
+    predictions_df['Date'] = pd.to_datetime(predictions_df['Date'])
+    return build_price_figure(bars, predictions_df, resolution)
+
+# --- Tab callbacks: nothing is fetched or computed until the tab is opened ---
+@callback(
+    Output("indicators-chart", "figure"),
+    [Input("dashboard-tabs", "active_tab"),
+     Input("chart-resolution", "value")],
+    State("current-ticker-store", "data"),
+)
+def update_indicators_chart(active_tab, resolution, ticker):
+    if active_tab != "tab-indicators" or not ticker:
+        return dash.no_update
+    bars = get_bars(ticker, resolution)
+    if bars.empty:
+        return go.Figure().update_layout(template="plotly_white", title=f"No {resolution} data available for {ticker}.")
+    return build_indicator_figure(calculate_technical_indicators(bars))
+
+@callback(
+    Output("news-content", "children"),
+    Input("dashboard-tabs", "active_tab"),
+    [State("current-ticker-store", "data"),
+     State("news-content", "children")],
+)
+def update_news_tab(active_tab, ticker, loaded):
+    if active_tab != "tab-news" or not ticker or loaded:
+        return dash.no_update
+    return html.Ul([
+        html.Li(html.A(article.get('title'), href=article.get('link'), target='_blank') if article.get('link') else article.get('title'))
+        for article in fetch_news(ticker)
+    ], className="mt-3")
+
+@callback(
+    Output("actions-content", "children"),
+    Input("dashboard-tabs", "active_tab"),
+    [State("current-ticker-store", "data"),
+     State("actions-content", "children")],
+)
+def update_actions_tab(active_tab, ticker, loaded):
+    if active_tab != "tab-actions" or not ticker or loaded:
+        return dash.no_update
+    dividends, splits = fetch_corporate_actions(ticker)
+    return dbc.Row([
+        dbc.Col([html.H5("Dividends"), dbc.Table.from_dataframe(dividends, striped=True, bordered=True, hover=True) if dividends is not None and not dividends.empty else html.P("No dividends on record.", className="text-muted")], md=6),
+        dbc.Col([html.H5("Stock Splits"), dbc.Table.from_dataframe(splits, striped=True, bordered=True, hover=True) if splits is not None and not splits.empty else html.P("No stock splits on record.", className="text-muted")], md=6),
+    ], className="mt-3")
 
 # --- ALL OTHER CALLBACKS (Transactions, Watchlist, Alerts) REMAIN THE SAME ---
 # --- NEW CALLBACK FOR AUTO-TRADE SWITCH ---
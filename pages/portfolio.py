@@ -3,14 +3,12 @@ import dash
 from dash import dcc, html, callback, Input, Output, State
 import dash_bootstrap_components as dbc
 import pandas as pd
-import yfinance as yf
 import plotly.graph_objects as go
 from utils.ml_model import get_simulated_price
 
 dash.register_page(__name__, name='Portfolio & Wallet')
 
 layout = dbc.Container(fluid=True, className="mt-4", children=[
-    dcc.Interval(id='interval-component', interval=15*1000),
     html.Div(id="add-funds-alert-placeholder"),
     
     dbc.Row([
@@ -3,22 +3,17 @@ import dash
 from dash import html, dcc, callback, Input, Output
 import dash_bootstrap_components as dbc
 import pandas as pd
-from utils.data_handler import screen_stocks
+from utils.screener import load_universe, run_screener
+from utils.snapshot import load_latest_snapshot
 
 dash.register_page(__name__, name='AI Screener')
 
-# Focused list of top Indian stocks for demonstration
-TOP_STOCKS_LIST = [
-    'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS',
-    'HINDUNILVR.NS', 'SBIN.NS', 'BAJFINANCE.NS', 'BHARTIARTL.NS', 'KOTAKBANK.NS'
-]
-
 layout = dbc.Container(fluid=True, className="mt-4", children=[
     html.H2("AI Stock Screener", className="text-center mb-4"),
     dbc.Card(
         dbc.CardBody([
             html.P(
-                "This powerful tool runs our proprietary AI analysis on a predefined list of top NSE stocks. The system evaluates each stock to identify the best 'Buy' opportunities in the current market.",
+                "This powerful tool screens the configured NSE universe with a fast technical prefilter, then runs our proprietary AI analysis on the strongest candidates to identify the best 'Buy' opportunities in the current market.",
                 className="text-center"
             ),
             dbc.Row(justify="center", children=[
@@ -45,7 +40,14 @@ def run_stock_screener(n_clicks):
     if n_clicks is None:
         return ""
 
-    analysis_results = screen_stocks(TOP_STOCKS_LIST)
+    # Serve the precomputed snapshot when one is fresh; fall back to screening on demand.
+    snapshot = load_latest_snapshot()
+    if snapshot and snapshot.get('screener') is not None:
+        analysis_results = snapshot['screener']
+        as_of = f"Precomputed analysis as of {pd.Timestamp(snapshot['generated_at']):%d %b %Y, %H:%M}."
+    else:
+        analysis_results = run_screener(load_universe())
+        as_of = f"Live analysis as of {pd.Timestamp.now():%d %b %Y, %H:%M}."
     
     if not analysis_results:
         return dbc.Alert("The analysis did not return any results. This may be due to a network issue. Please try again later.", color="warning", className="mt-4")
@@ -66,5 +68,6 @@ def run_stock_screener(n_clicks):
     
     return dbc.Card(dbc.CardBody([
         html.H4("Top 'Buy' Recommendations", className="mb-3"),
-        table
+        table,
+        html.P(as_of, className="small text-muted mb-0")
     ]), className="mt-4")
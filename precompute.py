@@ -0,0 +1,95 @@
+# precompute.py
+"""
+Batch job that precomputes analysis for the whole screening universe.
+
+Run it on a schedule (cron, Heroku Scheduler, ...) ahead of market hours:
+
+    python precompute.py [--universe data/universe.txt] [--top-k 10]
+
+It refreshes the stored price history and the similar-stocks index, fits the
+SVR forecast and computes indicators and recommendations for every ticker,
+then writes a versioned snapshot that the AI Screener and the dashboard serve from.
+"""
+import argparse
+import time
+from utils.data_handler import calculate_technical_indicators
+from utils.history_store import refresh_history
+from utils.ml_model import train_and_predict_svr, generate_recommendation
+from utils.screener import TOP_K, load_universe, prefilter_universe, rank_candidates
+from utils.similarity import refresh_similarity_index
+from utils.snapshot import SNAPSHOTS_TO_KEEP, load_latest_snapshot, write_snapshot
+
+def analyze_universe(panel, tickers):
+    """ Fits the forecast and computes indicators and a recommendation for each ticker. """
+    forecasts, recommendations = {}, {}
+    for ticker in tickers:
+        try:
+            if ticker not in panel.columns.get_level_values(1):
+                print(f"Skipping {ticker}: no stored history.")
+                continue
+            stock_data = panel.xs(ticker, axis=1, level=1).dropna(subset=['Close'])
+            predictions_df = train_and_predict_svr(stock_data, ticker=ticker)
+            if predictions_df.empty:
+                print(f"Skipping {ticker}: not enough history to forecast.")
+                continue
+            reco = generate_recommendation(stock_data, predictions_df)
+            latest = calculate_technical_indicators(stock_data.copy()).iloc[-1]
+
+            forecasts[ticker] = (predictions_df, reco)
+            recommendations[ticker] = {
+                **reco,
+                'close': float(stock_data['Close'].iloc[-1]),
+                'as_of': stock_data.index[-1].strftime("%Y-%m-%d"),
+                'indicators': {k: float(latest[k]) for k in ('RSI', 'MACD', 'Signal_Line', 'MACD_Hist')},
+                'forecast': [
+                    {'Date': d.strftime("%Y-%m-%d"), 'Predicted_Close': float(p)}
+                    for d, p in zip(predictions_df['Date'], predictions_df['Predicted_Close'])
+                ],
+            }
+        except Exception as e:
+            print(f"CRITICAL ERROR while analyzing {ticker}: {e}. Skipping.")
+            continue
+    return forecasts, recommendations
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute screener and dashboard analysis snapshot.")
+    parser.add_argument("--universe", help="Path to the universe file (defaults to STOCKSAARTHI_UNIVERSE or data/universe.txt)")
+    parser.add_argument("--top-k", type=int, default=TOP_K, help="Number of screener picks to keep")
+    parser.add_argument("--keep", type=int, default=SNAPSHOTS_TO_KEEP, help="Number of snapshot versions to retain")
+    args = parser.parse_args()
+
+    started = time.time()
+    tickers = load_universe(args.universe)
+    if not tickers:
+        raise SystemExit("Universe is empty; nothing to precompute.")
+
+    print(f"Refreshing stored history for {len(tickers)} tickers...")
+    panel = refresh_history(tickers)
+    if panel.empty:
+        raise SystemExit("No history available; snapshot not written.")
+
+    similarity, updated = refresh_similarity_index(panel)
+    print(f"Similarity index: {updated} tickers updated, {len(similarity.tickers)} indexed.")
+
+    print("Fitting forecasts and computing recommendations...")
+    forecasts, recommendations = analyze_universe(panel, tickers)
+
+    # Every survivor is already fitted, so the screener can rank all of them.
+    candidates = prefilter_universe(panel, max_candidates=None)
+    screener_rows = rank_candidates(panel, candidates.index, top_k=args.top_k, forecasts=forecasts,
+                                    similarity=similarity)
+
+    # Company names carry over between runs so the screener never looks them up one by one.
+    names = (load_latest_snapshot(max_age_hours=None) or {}).get('names', {})
+    names.update({row['Ticker']: row['Company Name'] for row in screener_rows})
+
+    path = write_snapshot({
+        'universe': tickers,
+        'screener': screener_rows,
+        'recommendations': recommendations,
+        'names': names,
+    }, keep=args.keep)
+    print(f"Wrote {path} ({len(recommendations)} tickers analyzed) in {time.time() - started:.1f}s.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+# replay.py
+"""
+Accelerated market replay for load-testing the auto-trade and price-alert path.
+
+Record OHLCV once, then replay it through the same quote-hub fan-out and
+engine code the live app uses, with thousands of simulated sessions:
+
+    python replay.py record --out data/replay [--universe data/universe.txt] [--period 1mo --interval 1d]
+    python replay.py run --data data/replay --sessions 2000 --speed 1 [--seed 42]
+
+`--speed` is trading days replayed per wall-clock second (0 = as fast as possible).
+Runs are deterministic for a given data set and seed; the ledger digest in the
+report lets two runs be compared.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import time
+import numpy as np
+import pandas as pd
+from utils.engine import run_engine_tick
+from utils.governor import get_history
+from utils.history_store import HISTORY_DIR
+from utils.quote_hub import QuoteHub
+from utils.screener import load_universe
+
+INITIAL_BALANCE = 1000000.00
+
+def load_recorded_bars(path):
+    """ Reads recorded OHLCV bars ({ticker}.csv or {ticker}.pkl files) from a directory. """
+    bars = {}
+    for file in sorted(glob.glob(os.path.join(path, "*.csv")) + glob.glob(os.path.join(path, "*.pkl"))):
+        ticker, ext = os.path.splitext(os.path.basename(file))
+        df = pd.read_csv(file, index_col=0, parse_dates=True) if ext == ".csv" else pd.read_pickle(file)
+        df = df.dropna(subset=['Open', 'High', 'Low', 'Close'])
+        if not df.empty:
+            bars[ticker] = df
+    return bars
+
+def build_ticks(bars):
+    """
+    Expands bars into an ordered tick stream of (timestamp, {ticker: quote}) deltas.
+    Up bars walk Open -> Low -> High -> Close and down bars Open -> High -> Low -> Close,
+    so targets inside a bar's range trigger the way they would intraday.
+    """
+    per_bar = {}
+    for ticker, df in bars.items():
+        prev = None
+        for ts, o, h, l, c in zip(df.index, df['Open'], df['High'], df['Low'], df['Close']):
+            prev = o if prev is None else prev
+            steps = per_bar.setdefault(ts, [{}, {}, {}, {}])
+            for step, price in zip(steps, (o, h, l, c) if c < o else (o, l, h, c)):
+                step[ticker] = {'price': round(float(price), 2), 'change': round(float(price - prev), 2),
+                                'change_pct': round(float((price - prev) / prev * 100), 2) if prev else 0.0}
+            prev = c
+    ticks = [(ts + pd.Timedelta(seconds=i), step) for ts in sorted(per_bar) for i, step in enumerate(per_bar[ts])]
+    return ticks, len({pd.Timestamp(ts).normalize() for ts in per_bar})
+
+class Session:
+    """ One simulated browser tab with its own wallet, holdings, auto-trades and price alerts. """
+    def __init__(self, sid, rng, opening_prices):
+        self.sid = sid
+        tickers = sorted(opening_prices)
+        self.balance, self.portfolio, self.trade_hist, self.wallet_hist = INITIAL_BALANCE, {}, [], []
+        self.auto_trades, self.price_alerts = {}, {}
+        for ticker in rng.sample(tickers, min(len(tickers), rng.randint(1, 3))):
+            price = opening_prices[ticker]
+            if rng.random() < 0.5:
+                self.auto_trades[ticker] = {'type': 'BUY', 'target': round(price * (1 - rng.uniform(0.005, 0.06)), 2)}
+            else:
+                self.portfolio[ticker] = {'quantity': rng.randint(1, 50), 'avg_price': price}
+                self.auto_trades[ticker] = {'type': 'SELL', 'target': round(price * (1 + rng.uniform(0.005, 0.06)), 2)}
+        for ticker in rng.sample(tickers, min(len(tickers), rng.randint(1, 3))):
+            price = opening_prices[ticker]
+            self.price_alerts[ticker] = {'upper': round(price * (1 + rng.uniform(0.01, 0.08)), 2),
+                                         'lower': round(price * (1 - rng.uniform(0.01, 0.08)), 2)}
+        self.initial_holdings = {t: p['quantity'] for t, p in self.portfolio.items()}
+        self.sub = None
+
+    @property
+    def rules(self):
+        return {'auto_trades': self.auto_trades, 'price_alerts': self.price_alerts}
+
+    @property
+    def tickers(self):
+        return set(self.auto_trades) | set(self.price_alerts)
+
+    def resubscribe(self, hub):
+        """ Mirrors live_updates.js, which reconnects whenever the session's stores change. """
+        if self.sub is not None:
+            hub.unsubscribe(self.sub)
+        self.sub = hub.subscribe(self.tickers, json.loads(json.dumps(self.rules))) if self.tickers else None
+
+    def check_ledger(self):
+        """ Returns a list of inconsistencies between the trade history, wallet history and state. """
+        problems, cash, holdings = [], INITIAL_BALANCE, dict(self.initial_holdings)
+        for trade in self.trade_hist:
+            total = float(trade['Total'].lstrip('₹').replace(',', ''))
+            sign = -1 if trade['Type'] == 'AUTO-BUY' else 1
+            cash += sign * total
+            holdings[trade['Stock']] = holdings.get(trade['Stock'], 0) - sign * trade['Quantity']
+        if abs(cash - self.balance) > 0.01 * (len(self.trade_hist) + 1):
+            problems.append(f"cash {cash:.2f} != balance {self.balance:.2f}")
+        if self.balance < 0:
+            problems.append(f"negative balance {self.balance:.2f}")
+        held = {t: p['quantity'] for t, p in self.portfolio.items()}
+        if {t: q for t, q in holdings.items() if q} != held:
+            problems.append(f"holdings {held} do not match trade history {holdings}")
+        if len(self.wallet_hist) != len(self.trade_hist):
+            problems.append("wallet history and trade history lengths differ")
+        elif self.wallet_hist and self.wallet_hist[-1]['Balance'] != f"₹{self.balance:,.2f}":
+            problems.append("last wallet history balance does not match balance")
+        return problems
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else 0.0
+
+def run_replay(bars, sessions=1000, speed=1.0, seed=42):
+    """ Replays recorded bars through the quote hub and engine; returns a metrics report. """
+    ticks, trading_days = build_ticks(bars)
+    if not ticks:
+        raise ValueError("No bars to replay.")
+    rng = random.Random(seed)
+    opening_prices = {t: float(df['Open'].iloc[0]) for t, df in bars.items()}
+    hub = QuoteHub(fetch_quote=None, autostart=False)
+    population = [Session(i, rng, opening_prices) for i in range(sessions)]
+    by_ticker = {}
+    for session in population:
+        session.resubscribe(hub)
+        for ticker in session.tickers:
+            by_ticker.setdefault(ticker, []).append(session)
+
+    tick_interval = (trading_days / speed) / len(ticks) if speed else 0.0
+    latencies, triggers, trades, alerts, fanout = [], 0, 0, 0, 0
+    started = time.perf_counter()
+    for i, (ts, deltas) in enumerate(ticks):
+        if tick_interval:
+            lag = started + i * tick_interval - time.perf_counter()
+            if lag > 0:
+                time.sleep(lag)
+        published = time.perf_counter()
+        hub.publish(deltas)
+        touched = sorted({s.sid: s for t in deltas for s in by_ticker.get(t, [])}.items())
+        for _, session in touched:
+            # Drain everything the hub queued for this session, re-running the engine on each trigger.
+            while session.sub is not None and not session.sub.queue.empty():
+                event, payload = session.sub.queue.get_nowait()
+                fanout += 1
+                if event != 'trigger':
+                    continue
+                triggers += 1
+                state = run_engine_tick(payload['prices'], session.auto_trades, session.price_alerts, session.balance,
+                                        session.portfolio, session.trade_hist, session.wallet_hist, now=ts)
+                (session.balance, session.portfolio, session.trade_hist, session.wallet_hist,
+                 new_trades, new_alerts, events) = state
+                latencies.append(time.perf_counter() - published)
+                trades += sum(kind == 'trade' for kind, _ in events)
+                alerts += sum(kind == 'alert' for kind, _ in events)
+                if events:
+                    session.auto_trades, session.price_alerts = new_trades, new_alerts
+                    session.resubscribe(hub)
+    elapsed = time.perf_counter() - started
+
+    violations = {s.sid: p for s in population if (p := s.check_ledger())}
+    digest = hashlib.sha256(json.dumps(
+        [(s.sid, round(s.balance, 2), s.portfolio, s.trade_hist) for s in population], sort_keys=True, default=str
+    ).encode()).hexdigest()[:16]
+    return {
+        'sessions': sessions, 'tickers': len(bars), 'trading_days': trading_days, 'ticks': len(ticks),
+        'wall_seconds': round(elapsed, 3), 'days_per_second': round(trading_days / elapsed, 2) if elapsed else None,
+        'events_delivered': fanout, 'triggers': triggers, 'trades': trades, 'alerts': alerts,
+        'triggers_per_second': round(triggers / elapsed, 1) if elapsed else None,
+        'latency_ms': {'p50': round(_percentile(latencies, 50), 3), 'p95': round(_percentile(latencies, 95), 3),
+                       'p99': round(_percentile(latencies, 99), 3), 'max': round(_percentile(latencies, 100), 3)},
+        'ledger_violations': len(violations), 'violation_examples': dict(list(violations.items())[:5]),
+        'ledger_digest': digest,
+    }
+
+def record(out, tickers, period, interval):
+    """ Saves provider OHLCV for each ticker as {out}/{ticker}.csv for later replays. """
+    os.makedirs(out, exist_ok=True)
+    for ticker in tickers:
+        try:
+            df = get_history(ticker, period=period, interval=interval)
+            if df.empty:
+                print(f"No data for {ticker}; skipped.")
+                continue
+            df[['Open', 'High', 'Low', 'Close', 'Volume']].to_csv(os.path.join(out, f"{ticker}.csv"))
+        except Exception as e:
+            print(f"Could not record {ticker}: {e}")
+    print(f"Recorded {len(tickers)} tickers to {out}.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Record market data or replay it against simulated sessions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="Record provider OHLCV to CSV files")
+    rec.add_argument("--out", default=os.path.join("data", "replay"))
+    rec.add_argument("--universe", help="Universe file (defaults to the screener universe)")
+    rec.add_argument("--period", default="1mo")
+    rec.add_argument("--interval", default="1d")
+    run = commands.add_parser("run", help="Replay recorded OHLCV through the auto-trade and alert engine")
+    run.add_argument("--data", default=HISTORY_DIR, help="Directory of recorded .csv/.pkl bars (defaults to the history store)")
+    run.add_argument("--sessions", type=int, default=1000)
+    run.add_argument("--speed", type=float, default=1.0, help="Trading days per second; 0 replays as fast as possible")
+    run.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.out, load_universe(args.universe), args.period, args.interval)
+        return
+    bars = load_recorded_bars(args.data)
+    if not bars:
+        raise SystemExit(f"No recorded bars found in {args.data}.")
+    print(json.dumps(run_replay(bars, sessions=args.sessions, speed=args.speed, seed=args.seed), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# utils/bar_store.py
+import os
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+from utils.governor import get_history
+
+# Bucket widths for every resolution the app can show; '1w' buckets start on Monday.
+RESOLUTIONS = {'1m': '1min', '5m': '5min', '15m': '15min', '1h': '1h', '1d': '1D', '1w': None}
+# Intraday buckets are anchored at the NSE session open (09:15, 10:15, ...) like the provider's own bars.
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=15)
+RESOLUTION_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '1h': 60, '1d': 1440, '1w': 10080}
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+MAX_TICKERS = int(os.environ.get("BAR_STORE_TICKERS", 256))  # LRU bound on tickers each store keeps
+
+def bucket_starts(index, resolution):
+    """ Maps each timestamp to the start of the `resolution` bar it belongs to. """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unsupported resolution '{resolution}'. Choose from {list(RESOLUTIONS)}.")
+    if resolution == '1w':
+        days = index.normalize()
+        return days - pd.to_timedelta(days.dayofweek, unit='D')
+    if resolution == '1d':
+        return index.floor(RESOLUTIONS[resolution])
+    return (index - SESSION_OPEN).floor(RESOLUTIONS[resolution]) + SESSION_OPEN
+
+def resample_bars(df, resolution):
+    """ Aggregates OHLCV bars into coarser `resolution` bars in one vectorized groupby. """
+    if df.empty:
+        return df
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in df.columns}
+    bars = df.groupby(bucket_starts(df.index, resolution)).agg(agg)
+    bars.index.name = df.index.name
+    return bars.dropna(subset=['Close'])
+
+class BarStore:
+    """
+    Keeps one base resolution of bars per ticker and derives coarser resolutions on demand.
+    Aggregations are cached per (ticker, resolution); when new base bars arrive only the
+    last (possibly partial) bucket onwards is recomputed. Past `max_tickers`, the least
+    recently read ticker is dropped with its aggregations.
+    """
+    def __init__(self, base_resolution='1d', period='1y', max_age=60, window=pd.Timedelta(days=366),
+                 max_tickers=MAX_TICKERS):
+        self.base_resolution, self.period, self.max_age, self.window = base_resolution, period, max_age, window
+        self.max_tickers = max_tickers
+        self._base, self._aggregates, self._refreshed = OrderedDict(), {}, {}
+        self._lock = threading.Lock()
+
+    def supports(self, resolution):
+        return RESOLUTION_MINUTES[resolution] >= RESOLUTION_MINUTES[self.base_resolution]
+
+    def append(self, ticker, new_bars):
+        """ Merges new base bars for a ticker and incrementally updates its cached aggregations. """
+        if new_bars is None or new_bars.empty:
+            return
+        with self._lock:
+            base = self._base.get(ticker)
+            if base is not None and not base.empty:
+                first_new = new_bars.index[0]
+                base = pd.concat([base[base.index < first_new], new_bars])
+            else:
+                base, first_new = new_bars, None
+            base = base[~base.index.duplicated(keep='last')].sort_index()
+            base = base[base.index >= base.index[-1] - self.window]
+            self._base[ticker] = base
+            self._base.move_to_end(ticker)
+            while len(self._base) > self.max_tickers:
+                self._evict(next(iter(self._base)))
+
+            for (t, resolution), agg in list(self._aggregates.items()):
+                if t != ticker:
+                    continue
+                if first_new is None or agg.empty:
+                    del self._aggregates[(t, resolution)]
+                    continue
+                # Rebuild from the earliest bucket the new bars could touch; keep everything before it.
+                cutoff = min(agg.index[-1], bucket_starts(pd.DatetimeIndex([first_new]), resolution)[0])
+                tail = base[bucket_starts(base.index, resolution) >= cutoff]
+                head = agg[(agg.index < cutoff) & (agg.index >= bucket_starts(base.index[:1], resolution)[0])]
+                self._aggregates[(t, resolution)] = pd.concat([head, resample_bars(tail, resolution)])
+
+    def _evict(self, ticker):
+        # Caller holds self._lock.
+        self._base.pop(ticker, None)
+        self._refreshed.pop(ticker, None)
+        for key in [key for key in self._aggregates if key[0] == ticker]:
+            del self._aggregates[key]
+
+    def refresh(self, ticker):
+        """ Fetches base bars newer than what is stored (the whole period on first use). """
+        base = self._base.get(ticker)
+        # Daily is the provider default; leaving `interval` out shares the governor cache with fetch_stock_data.
+        interval = {} if self.base_resolution == '1d' else {'interval': self.base_resolution}
+        if base is None or base.empty:
+            new_bars = get_history(ticker, period=self.period, **interval)
+        else:
+            # Re-fetch from the start of the last stored day; that bar may have been partial.
+            new_bars = get_history(ticker, start=base.index[-1].strftime("%Y-%m-%d"), **interval)
+        self.append(ticker, new_bars)
+        self._refreshed[ticker] = time.monotonic()
+
+    def get_bars(self, ticker, resolution=None):
+        """ Returns bars for `ticker` at `resolution` (defaults to the base resolution). """
+        resolution = resolution or self.base_resolution
+        if not self.supports(resolution):
+            raise ValueError(f"Cannot derive {resolution} bars from a {self.base_resolution} base.")
+        if time.monotonic() - self._refreshed.get(ticker, float('-inf')) > self.max_age:
+            try:
+                self.refresh(ticker)
+            except Exception as e:
+                print(f"Could not refresh {self.base_resolution} bars for {ticker}: {e}")
+        with self._lock:
+            base = self._base.get(ticker)
+            if base is None or base.empty:
+                return pd.DataFrame()
+            self._base.move_to_end(ticker)
+            if resolution == self.base_resolution:
+                return base.copy()
+            agg = self._aggregates.get((ticker, resolution))
+            if agg is None:
+                agg = self._aggregates[(ticker, resolution)] = resample_bars(base, resolution)
+            return agg.copy()
+
+# One minute-bar store for intraday views (the provider keeps ~7 days of 1m data) and a daily one.
+intraday_store = BarStore(base_resolution='1m', period='5d', max_age=60, window=pd.Timedelta(days=7))
+daily_store = BarStore(base_resolution='1d', period='1y', max_age=15 * 60)
+
+def get_bars(ticker, resolution='1d'):
+    """ Bars for any supported resolution, served from whichever store's base can derive them. """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unsupported resolution '{resolution}'. Choose from {list(RESOLUTIONS)}.")
+    store = intraday_store if RESOLUTION_MINUTES[resolution] < RESOLUTION_MINUTES['1d'] else daily_store
+    return store.get_bars(ticker, resolution)
@@ -1,7 +1,7 @@
 # utils/data_handler.py
-import yfinance as yf
 import pandas as pd
-from utils.ml_model import train_and_predict_svr, generate_recommendation
+from utils.bar_store import resample_bars
+from utils.governor import get_history, get_info, get_news, get_actions
 
 def fetch_stock_data(ticker, period="1y"):
     """
@@ -9,15 +9,14 @@ def fetch_stock_data(ticker, period="1y"):
     FIXED: Added more reliable validation to prevent crashes on valid but unusual tickers.
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_info(ticker)
         
         # More robust validation: Check for marketCap or a price key. 'longName' can be missing.
         if not info or ('marketCap' not in info and 'currentPrice' not in info):
             print(f"Validation failed: Incomplete info for ticker: {ticker}")
             return None, None
 
-        hist = stock.history(period=period)
+        hist = get_history(ticker, period=period)
         if hist.empty:
             print(f"No historical data found for {ticker} for period {period}.")
             return None, None
@@ -35,8 +34,7 @@ def fetch_market_news():
     tickers_to_try = ["^NSEI", "^BSESN"] # Try Nifty 50, then Sensex
     for ticker in tickers_to_try:
         try:
-            stock = yf.Ticker(ticker)
-            news = stock.news
+            news = get_news(ticker)
             if news and len(news) > 0:
                 print(f"Successfully fetched news for {ticker}")
                 return news[:10] # Return first 10 articles
@@ -46,41 +44,16 @@ def fetch_market_news():
     
     return [{"title": "Error: Could not fetch market news at this time."}]
 
-def screen_stocks(ticker_list):
-    """
-    Analyzes a list of stock tickers to find potential investment opportunities.
-    FIXED: Wrapped individual ticker analysis in a try-except block so that
-    one failed stock doesn't stop the entire screening process.
-    """
-    screened_list = []
-    for ticker in ticker_list:
-        try:
-            print(f"Screening {ticker}...")
-            stock_data, stock_info = fetch_stock_data(ticker)
-            if stock_data is None or stock_info is None:
-                print(f"Skipping {ticker} due to insufficient data.")
-                continue
-
-            predictions_df = train_and_predict_svr(stock_data)
-            recommendation = generate_recommendation(stock_data, predictions_df)
-
-            recommendation['Ticker'] = ticker
-            recommendation['Company Name'] = stock_info.get('longName', ticker)
-            recommendation['Current Price'] = f"₹{stock_data['Close'].iloc[-1]:,.2f}"
-
-            ordered_reco = {
-                'Ticker': recommendation['Ticker'],
-                'Company Name': recommendation['Company Name'],
-                'Recommendation': recommendation['recommendation'],
-                'Current Price': recommendation['Current Price'],
-                '10-Day Target': f"₹{recommendation['target_price']}",
-                'Risk Level': recommendation['risk']
-            }
-            screened_list.append(ordered_reco)
-        except Exception as e:
-            print(f"CRITICAL ERROR while screening {ticker}: {e}. Skipping.")
-            continue
-    return screened_list
+def format_screener_row(ticker, stock_info, stock_data, recommendation):
+    """ Formats a recommendation into the row layout shown by the AI Screener table. """
+    return {
+        'Ticker': ticker,
+        'Company Name': (stock_info or {}).get('longName', ticker),
+        'Recommendation': recommendation['recommendation'],
+        'Current Price': f"₹{stock_data['Close'].iloc[-1]:,.2f}",
+        '10-Day Target': f"₹{recommendation['target_price']}",
+        'Risk Level': recommendation['risk']
+    }
 
 # --- Other functions remain largely the same, but are included for completeness ---
 def get_key_metrics(info, stock_data):
@@ -100,8 +73,10 @@ def get_key_metrics(info, stock_data):
     }
     return metrics, 'gain-color' if change >= 0 else 'loss-color'
 
-def calculate_technical_indicators(df):
-    """Calculates RSI and MACD for a given stock data DataFrame."""
+def calculate_technical_indicators(df, resolution=None):
+    """Calculates RSI and MACD for a given stock data DataFrame, optionally resampled to `resolution` bars first."""
+    if resolution:
+        df = resample_bars(df, resolution)
     delta = df['Close'].diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
     loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
@@ -117,8 +92,7 @@ def calculate_technical_indicators(df):
 def fetch_news(ticker):
     """Fetches the latest news articles for a specific stock ticker."""
     try:
-        stock = yf.Ticker(ticker)
-        news = stock.news[:5]
+        news = get_news(ticker)[:5]
         return news if news else [{"title": "No recent news found for this stock."}]
     except Exception as e:
         print(f"Could not fetch news for {ticker}. Error: {e}")
@@ -127,7 +101,7 @@ def fetch_news(ticker):
 def fetch_corporate_actions(ticker):
     """Fetches and formats dividends and stock splits for a ticker."""
     try:
-        actions_df = yf.Ticker(ticker).actions
+        actions_df = get_actions(ticker)
         if actions_df.empty: return None, None
         actions_df = actions_df.reset_index().sort_values(by='Date', ascending=False)
         actions_df['Date'] = actions_df['Date'].dt.strftime('%Y-%m-%d')
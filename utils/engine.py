@@ -0,0 +1,64 @@
+# utils/engine.py
+import pandas as pd
+
+def run_engine_tick(prices, auto_trades, price_alerts, balance, portfolio, trade_hist, wallet_hist, now=None):
+    """
+    Applies one round of auto-trades and price alerts against `prices` ({ticker: price}).
+    Shared by the live background_engine callback and the replay harness, so `now` can
+    pin the ledger timestamps to simulated time. Returns the updated ledger state plus
+    a list of (kind, message) events, where kind is 'trade' or 'alert'.
+    """
+    stamp = (now or pd.Timestamp.now()).strftime("%Y-%m-%d %H:%M:%S")
+    events, active_trades, active_alerts = [], auto_trades.copy(), price_alerts.copy()
+
+    # Auto-Trade Logic
+    for ticker, params in auto_trades.items():
+        try:
+            current_price = prices.get(ticker)
+            if current_price is None: continue
+            trade_executed, alert_msg = False, ""
+            if params['type'] == 'BUY' and current_price <= params['target']:
+                qty, cost = 10, 10 * current_price
+                if balance >= cost:
+                    balance -= cost
+                    if ticker in portfolio:
+                        new_qty = portfolio[ticker]['quantity'] + qty
+                        new_avg = ((portfolio[ticker]['avg_price'] * portfolio[ticker]['quantity']) + cost) / new_qty
+                        portfolio[ticker] = {'quantity': new_qty, 'avg_price': new_avg}
+                    else:
+                        portfolio[ticker] = {'quantity': qty, 'avg_price': current_price}
+                    trade_hist.append({'Date': stamp, 'Stock': ticker, 'Type': 'AUTO-BUY', 'Quantity': qty, 'Price': f"₹{current_price:,.2f}", 'Total': f"₹{cost:,.2f}"})
+                    wallet_hist.append({'Date': stamp, 'Description': f"AUTO-BUY {ticker}", 'Amount': f"-₹{cost:,.2f}", 'Balance': f"₹{balance:,.2f}"})
+                    alert_msg, trade_executed = f"Auto-Trade: Bought {qty} shares of {ticker}.", True
+            elif params['type'] == 'SELL' and current_price >= params['target']:
+                if ticker in portfolio and portfolio[ticker]['quantity'] > 0:
+                    qty, sale = portfolio[ticker]['quantity'], portfolio[ticker]['quantity'] * current_price
+                    balance += sale
+                    del portfolio[ticker]
+                    trade_hist.append({'Date': stamp, 'Stock': ticker, 'Type': 'AUTO-SELL', 'Quantity': qty, 'Price': f"₹{current_price:,.2f}", 'Total': f"₹{sale:,.2f}"})
+                    wallet_hist.append({'Date': stamp, 'Description': f"AUTO-SELL {ticker}", 'Amount': f"+₹{sale:,.2f}", 'Balance': f"₹{balance:,.2f}"})
+                    alert_msg, trade_executed = f"Auto-Trade: Sold {qty} shares of {ticker}.", True
+            if trade_executed:
+                del active_trades[ticker]
+                events.append(('trade', alert_msg))
+        except Exception as e:
+            print(f"Auto-trade for {ticker} failed: {e}")
+            continue
+
+    # Price Alert Logic
+    for ticker, params in price_alerts.items():
+        try:
+            current_price = prices.get(ticker)
+            if current_price is None: continue
+            if params.get('upper') and current_price >= params['upper']:
+                events.append(('alert', f"Price Alert: {ticker} crossed upper target of {params['upper']}."))
+                active_alerts[ticker].pop('upper', None)
+            if params.get('lower') and current_price <= params['lower']:
+                events.append(('alert', f"Price Alert: {ticker} crossed lower target of {params['lower']}."))
+                active_alerts[ticker].pop('lower', None)
+            if not active_alerts.get(ticker): del active_alerts[ticker]
+        except Exception as e:
+            print(f"Price alert check for {ticker} failed: {e}")
+            continue
+
+    return balance, portfolio, trade_hist, wallet_hist, active_trades, active_alerts, events
@@ -0,0 +1,222 @@
+# utils/governor.py
+import copy
+import os
+from collections import OrderedDict
+import random
+import threading
+import time
+from utils.providers import FakeProvider, UpstreamError, YFinanceProvider, is_transient
+
+# Limits are per process; with several gunicorn workers divide the provider's quota between them.
+UPSTREAM_RATE = float(os.environ.get("UPSTREAM_RATE", 2.0))     # sustained requests per second
+UPSTREAM_BURST = int(os.environ.get("UPSTREAM_BURST", 5))       # bucket capacity
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5                                               # seconds, doubled per attempt
+BACKOFF_CAP = 8.0
+FAILURE_THRESHOLD = 5                                            # consecutive failures that open the breaker
+RESET_TIMEOUT = 30.0                                             # seconds the breaker stays open
+STALE_TTL = 24 * 3600                                            # oldest cached value served while upstream is down
+CACHE_MAX_ENTRIES = int(os.environ.get("UPSTREAM_CACHE_ENTRIES", 2048))  # LRU bound on cached responses
+
+# Freshness per upstream method: a cached value younger than this is served without a call.
+CACHE_TTL = {'history': 30, 'download': 300, 'info': 300, 'news': 300, 'actions': 3600}
+
+class CircuitOpenError(UpstreamError):
+    """ Raised when the breaker is open and no cached value is available. """
+
+class TokenBucket:
+    """
+    Blocking token-bucket rate limiter. A call costing more than the burst (e.g. a batched
+    download of hundreds of tickers) waits for a full bucket, then takes the bucket into debt
+    for the remainder, so later callers wait until the whole cost has been paid back.
+    """
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity = rate, capacity
+        self._tokens, self._updated = float(capacity), time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        needed = min(cost, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= cost
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+
+class CircuitBreaker:
+    """ Opens after `threshold` consecutive failures; lets one trial call through after `reset_timeout`. """
+    def __init__(self, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.threshold, self.reset_timeout = threshold, reset_timeout
+        self.failures, self.opened_at = 0, None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'half-open':
+                self.opened_at = time.monotonic()  # only one trial call per timeout window
+                return True
+            return self.state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self.opened_at = 0, None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value, self.error = None, None
+
+def _copy(value):
+    # Callers routinely add columns to the frames they get back, so never hand out the cached object.
+    return value.copy() if hasattr(value, 'copy') else copy.copy(value)
+
+def _is_empty(value):
+    return value is None or (hasattr(value, 'empty') and value.empty) or (isinstance(value, (list, dict)) and not value)
+
+class Governor:
+    """
+    Coordinates every upstream market-data call: serves fresh cache, coalesces identical
+    in-flight requests, rate-limits with a token bucket, retries with jittered backoff and
+    trips a circuit breaker that falls back to stale cache while the provider is down.
+    Only transient errors are retried or counted by the breaker; a permanent one (e.g. an
+    unknown symbol) fails that call straight away without affecting anyone else.
+    """
+    def __init__(self, provider, rate=UPSTREAM_RATE, burst=UPSTREAM_BURST, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, breaker=None):
+        self.provider = provider
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries, self.backoff_base = max_retries, backoff_base
+        self.stats = {'calls': 0, 'upstream': 0, 'cache_hits': 0, 'coalesced': 0, 'retries': 0, 'stale': 0, 'failures': 0}
+        self._cache, self._inflight = OrderedDict(), {}
+        self._lock = threading.Lock()
+
+    def call(self, method, *args, cost=1, **kwargs):
+        key = (method, args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            self.stats['calls'] += 1
+            cached = self._cache.get(key)
+            if cached:
+                self._cache.move_to_end(key)
+            if cached and time.monotonic() - cached[0] < CACHE_TTL.get(method, 60):
+                self.stats['cache_hits'] += 1
+                return _copy(cached[1])
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = _InFlight()
+            else:
+                self.stats['coalesced'] += 1
+        if not leader:
+            pending.done.wait()
+            if pending.error:
+                raise pending.error
+            return _copy(pending.value)
+
+        try:
+            pending.value = self._fetch(key, method, args, kwargs, cost)
+            return _copy(pending.value)
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            pending.done.set()
+
+    def _fetch(self, key, method, args, kwargs, cost):
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                last_error = CircuitOpenError(f"Upstream circuit open; refusing {method}{args}")
+                break
+            if attempt:
+                self.stats['retries'] += 1
+                time.sleep(random.uniform(0, min(BACKOFF_CAP, self.backoff_base * 2 ** attempt)))
+            self.bucket.acquire(cost)
+            try:
+                self.stats['upstream'] += 1
+                value = getattr(self.provider, method)(*args, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    self.stats['failures'] += 1
+                    raise
+                last_error = e
+                self.breaker.record_failure()
+                continue
+            self.breaker.record_success()
+            self._store(key, value)
+            return value
+
+        self.stats['failures'] += 1
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < STALE_TTL:
+            self.stats['stale'] += 1
+            print(f"Serving stale {method}{args} after upstream failure: {last_error}")
+            return cached[1]
+        raise last_error
+
+    def _store(self, key, value):
+        """ Caches a response, dropping entries too old to serve even as stale, then least recently used ones. """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if _is_empty(value) and cached and not _is_empty(cached[1]):
+                return  # never let an empty answer overwrite data we could still serve as stale
+            self._cache[key] = (now, value)
+            self._cache.move_to_end(key)
+            if len(self._cache) > CACHE_MAX_ENTRIES:
+                for old_key in [k for k, (at, _) in self._cache.items() if now - at >= STALE_TTL]:
+                    del self._cache[old_key]
+            while len(self._cache) > CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+def _default_provider():
+    if os.environ.get("STOCKSAARTHI_PROVIDER") == "fake":
+        return FakeProvider(latency=float(os.environ.get("FAKE_PROVIDER_LATENCY", 0)),
+                            error_rate=float(os.environ.get("FAKE_PROVIDER_ERROR_RATE", 0)))
+    return YFinanceProvider()
+
+governor = Governor(_default_provider())
+
+def set_provider(provider):
+    """ Swaps the upstream provider (e.g. for a FakeProvider) and resets the governor state. """
+    global governor
+    governor = Governor(provider, rate=governor.bucket.rate, burst=governor.bucket.capacity,
+                        max_retries=governor.max_retries, backoff_base=governor.backoff_base)
+    return governor
+
+# --- Convenience wrappers used throughout the app ---
+def get_history(ticker, **kwargs):
+    return governor.call('history', ticker, **kwargs)
+
+def get_info(ticker):
+    return governor.call('info', ticker)
+
+def get_news(ticker):
+    return governor.call('news', ticker)
+
+def get_actions(ticker):
+    return governor.call('actions', ticker)
+
+def download(tickers, **kwargs):
+    tickers = tuple(tickers)
+    return governor.call('download', tickers, cost=len(tickers), **kwargs)
@@ -0,0 +1,96 @@
+# utils/history_store.py
+import os
+import pandas as pd
+from utils.governor import UPSTREAM_BURST, download
+
+DATA_DIR = os.environ.get(
+    "STOCKSAARTHI_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+)
+HISTORY_DIR = os.path.join(DATA_DIR, "history")
+HISTORY_WINDOW_DAYS = 365  # matches the 1y period the models were tuned on
+# Tickers per upstream batch. Chunks no larger than the governor's burst never put its bucket
+# into debt, so interactive calls (dashboard, quotes) get tokens between chunks.
+DOWNLOAD_CHUNK = int(os.environ.get("DOWNLOAD_CHUNK", UPSTREAM_BURST))
+
+def _history_path(ticker):
+    return os.path.join(HISTORY_DIR, f"{ticker.upper()}.pkl")
+
+def load_history(ticker):
+    """ Returns the stored daily OHLCV for a ticker, or None if nothing is stored yet. """
+    path = _history_path(ticker)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception as e:
+        print(f"Could not read stored history for {ticker}: {e}")
+        return None
+
+def save_history(ticker, df):
+    """ Atomically writes a ticker's OHLCV to the store. """
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    path = _history_path(ticker)
+    tmp_path = f"{path}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+def download_history(tickers, **kwargs):
+    """
+    Downloads OHLCV for many tickers in batched requests of DOWNLOAD_CHUNK tickers,
+    returned as {ticker: DataFrame}. A failed chunk is logged and skipped.
+    """
+    tickers = list(tickers)
+    frames = {}
+    for start in range(0, len(tickers), DOWNLOAD_CHUNK):
+        chunk = tickers[start:start + DOWNLOAD_CHUNK]
+        try:
+            panel = download(chunk, group_by='column', auto_adjust=False, threads=True, progress=False, **kwargs)
+        except Exception as e:
+            print(f"History download failed for {len(chunk)} tickers: {e}")
+            continue
+        if panel.empty:
+            continue
+        if not isinstance(panel.columns, pd.MultiIndex):
+            panel.columns = pd.MultiIndex.from_product([panel.columns, chunk])
+        for ticker in panel.columns.get_level_values(1).unique():
+            df = panel.xs(ticker, axis=1, level=1).dropna(subset=['Close'])
+            if not df.empty:
+                frames[ticker] = df
+    return frames
+
+def refresh_history(tickers, period="1y"):
+    """
+    Brings the stored history up to date for every ticker and returns it as a
+    (field, ticker) panel. Tickers already in the store only download the bars
+    since their last stored date; new tickers get the full period.
+    """
+    stored = {t: load_history(t) for t in tickers}
+    missing = [t for t, df in stored.items() if df is None or df.empty]
+    existing = [t for t in tickers if t not in missing]
+
+    fresh = download_history(missing, period=period) if missing else {}
+    if existing:
+        # The last stored bar may have been a partial session, so re-fetch from that date.
+        since = min(stored[t].index[-1] for t in existing)
+        fresh.update(download_history(existing, start=since.strftime("%Y-%m-%d")))
+
+    frames = {}
+    for ticker in tickers:
+        df = stored.get(ticker)
+        new = fresh.get(ticker)
+        if new is not None:
+            df = new if df is None or df.empty else pd.concat([df, new])
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+            df = df[df.index >= df.index[-1] - pd.Timedelta(days=HISTORY_WINDOW_DAYS)]
+            save_history(ticker, df)
+        if df is not None and not df.empty:
+            frames[ticker] = df
+
+    return frames_to_panel(frames)
+
+def frames_to_panel(frames):
+    """ Combines {ticker: OHLCV DataFrame} into one panel with (field, ticker) columns. """
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
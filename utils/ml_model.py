@@ -1,13 +1,12 @@
 # utils/ml_model.py
 import numpy as np
 import pandas as pd
-from sklearn.svm import SVR
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import RandomizedSearchCV
 from datetime import timedelta
-import yfinance as yf
+from utils.governor import get_history
+from utils.svr_search import fit_best_svr
 
-def train_and_predict_svr(stock_data, days_to_predict=10):
+def train_and_predict_svr(stock_data, days_to_predict=10, ticker=None):
     if stock_data.empty or len(stock_data) < 50:
         return pd.DataFrame()
 
@@ -18,10 +17,7 @@ def train_and_predict_svr(stock_data, days_to_predict=10):
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
     
-    param_distributions = {'C': [1, 10, 100, 1000], 'gamma': np.logspace(-2, 2, 5), 'epsilon': [0.01, 0.1, 0.5]}
-    random_search = RandomizedSearchCV(SVR(kernel='rbf'), param_distributions, n_iter=10, cv=3, scoring='neg_mean_squared_error', n_jobs=-1, random_state=42)
-    random_search.fit(X_scaled, y)
-    best_svr_model = random_search.best_estimator_
+    best_svr_model = fit_best_svr(X_scaled, y, ticker=ticker)
     
     last_date = data['Date'].iloc[-1]
     future_dates = [last_date + timedelta(days=i) for i in range(1, days_to_predict + 1)]
@@ -33,9 +29,9 @@ def train_and_predict_svr(stock_data, days_to_predict=10):
 
 def get_simulated_price(ticker, time_delta_days, purchase_price):
     try:
-        hist = yf.Ticker(ticker).history(period="1y")
+        hist = get_history(ticker, period="1y")
         if hist.empty: return purchase_price * (1 + time_delta_days * 0.01)
-        predictions_df = train_and_predict_svr(hist, days_to_predict=time_delta_days)
+        predictions_df = train_and_predict_svr(hist, days_to_predict=time_delta_days, ticker=ticker)
         if predictions_df.empty: return purchase_price * (1 + time_delta_days * 0.01)
         future_price = predictions_df['Predicted_Close'].iloc[-1]
         guaranteed_price = purchase_price * (1 + time_delta_days * 0.005)
@@ -0,0 +1,154 @@
+# utils/providers.py
+import random
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+class UpstreamError(Exception):
+    """ Raised when the market data provider fails or refuses a request. """
+
+class TransientUpstreamError(UpstreamError):
+    """ A failure worth retrying: timeout, throttling or a provider-side (5xx) error. """
+
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+def is_transient(error):
+    """
+    True for errors that say nothing about the request itself (network trouble, rate limiting,
+    provider outages). Permanent ones such as an unknown symbol return False.
+    """
+    if isinstance(error, TransientUpstreamError):
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(getattr(error, 'response', None), 'status_code', None) or getattr(error, 'status_code', None)
+    if status is not None:
+        return status in TRANSIENT_STATUS
+    name, message = type(error).__name__, str(error)
+    return ('RateLimit' in name or 'Timeout' in name or 'ConnectionError' in name
+            or 'Too Many Requests' in message or 'timed out' in message.lower())
+
+def _require_prices(frame, what):
+    # yfinance reports most outages as an empty frame (or all-NaN prices) rather than an exception;
+    # surface them so the governor retries, trips the breaker and serves stale cache instead.
+    if frame is None or frame.empty or frame.filter(like='Close').isna().all().all():
+        raise TransientUpstreamError(f"Empty price data returned for {what}")
+    return frame
+
+class YFinanceProvider:
+    """ Thin adapter over yfinance; every upstream call in the app goes through one of these methods. """
+    def __init__(self):
+        # Let yfinance raise instead of logging and returning empty results: unknown symbols then
+        # surface as permanent YFTickerMissingError/YFPricesMissingError, network trouble as transient.
+        debug = getattr(getattr(yf, 'config', None), 'debug', None)
+        if debug is not None:
+            debug.hide_exceptions = False
+
+    def history(self, ticker, **kwargs):
+        return _require_prices(yf.Ticker(ticker).history(**kwargs), ticker)
+
+    def info(self, ticker):
+        return yf.Ticker(ticker).info
+
+    def news(self, ticker):
+        return yf.Ticker(ticker).news
+
+    def actions(self, ticker):
+        return yf.Ticker(ticker).actions
+
+    def download(self, tickers, **kwargs):
+        return _require_prices(yf.download(list(tickers), **kwargs), f"{len(tickers)} tickers")
+
+_PERIOD_DAYS = {'d': 1, 'wk': 5, 'mo': 21, 'y': 252}
+
+def _period_to_bars(period):
+    for suffix, days in _PERIOD_DAYS.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return int(period[:-len(suffix)]) * days
+    return 252 * 5 if period == 'max' else 252
+
+class FakeProvider:
+    """
+    Local stand-in for yfinance that serves deterministic synthetic data.
+    `latency` (seconds) and `error_rate` (0-1) are injected on every call, and
+    `down=True` makes every call fail, for exercising the governor offline.
+    """
+    def __init__(self, latency=0.0, error_rate=0.0, down=False, seed=0, end=None):
+        self.latency, self.error_rate, self.down = latency, error_rate, down
+        self.end = pd.Timestamp(end or pd.Timestamp.now().normalize())
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _upstream(self):
+        with self._lock:
+            self.calls += 1
+            fail = self.down or self._rng.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise TransientUpstreamError("Injected upstream failure")
+
+    def _bars(self, ticker, n):
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        total = max(n, 252 * 5)
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.015, total)))[-n:]
+        index = pd.bdate_range(end=self.end, periods=n, name='Date')
+        return pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.003, n)),
+            'High': close * 1.01,
+            'Low': close * 0.99,
+            'Close': close,
+            'Volume': rng.integers(100_000, 5_000_000, n).astype(float),
+        }, index=index)
+
+    def _minute_bars(self, ticker, days):
+        # NSE session 09:15-15:30 is 375 one-minute bars; scale the daily walk down to minute steps.
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()) + 1)
+        sessions = pd.bdate_range(end=self.end, periods=days)
+        index = pd.DatetimeIndex(np.concatenate([
+            pd.date_range(day + pd.Timedelta(hours=9, minutes=15), periods=375, freq='1min') for day in sessions
+        ]), name='Datetime')
+        close = self._bars(ticker, days + 1)['Close'].iloc[0] * np.exp(np.cumsum(rng.normal(0, 0.0008, len(index))))
+        return pd.DataFrame({
+            'Open': close, 'High': close * 1.0005, 'Low': close * 0.9995, 'Close': close,
+            'Volume': rng.integers(100, 20_000, len(index)).astype(float),
+        }, index=index)
+
+    def history(self, ticker, period="1mo", start=None, interval="1d", **kwargs):
+        self._upstream()
+        if interval == "1m":
+            df = self._minute_bars(ticker, min(_period_to_bars(period) if start is None else 7, 7))
+        else:
+            df = self._bars(ticker, _period_to_bars(period) if start is None else 252 * 5)
+        return df[df.index >= pd.Timestamp(start)] if start is not None else df
+
+    def info(self, ticker):
+        self._upstream()
+        close = self._bars(ticker, 2)['Close']
+        return {
+            'symbol': ticker, 'longName': f"{ticker.split('.')[0].title()} Ltd", 'exchangeName': 'NSI',
+            'currency': 'INR', 'marketCap': int(close.iloc[-1] * 1e8),
+            'currentPrice': float(close.iloc[-1]), 'previousClose': float(close.iloc[-2]),
+            'trailingPE': 24.5, 'fiftyTwoWeekHigh': float(close.max() * 1.2), 'fiftyTwoWeekLow': float(close.min() * 0.8),
+        }
+
+    def news(self, ticker):
+        self._upstream()
+        return [{'title': f"{ticker} headline {i}", 'publisher': 'Fake Wire', 'link': f"https://example.com/{ticker}/{i}"} for i in range(10)]
+
+    def actions(self, ticker):
+        self._upstream()
+        index = pd.DatetimeIndex([self.end - pd.DateOffset(months=m) for m in (3, 15)], name='Date')
+        return pd.DataFrame({'Dividends': [5.0, 4.5], 'Stock Splits': [0.0, 2.0]}, index=index)
+
+    def download(self, tickers, period="1y", start=None, **kwargs):
+        self._upstream()
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        n = _period_to_bars(period) if start is None else 252 * 5
+        frames = {t: self._bars(t, n) for t in tickers}
+        panel = pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+        return panel[panel.index >= pd.Timestamp(start)] if start is not None else panel
@@ -0,0 +1,252 @@
+# utils/quote_hub.py
+import json
+import os
+import queue
+import threading
+import time
+from flask import Response, request, stream_with_context
+from utils.governor import get_history
+
+POLL_INTERVAL = float(os.environ.get("QUOTE_POLL_INTERVAL", 5))  # seconds between upstream sweeps
+HEARTBEAT_INTERVAL = 15                                          # keeps idle proxies from closing the stream
+POLL_CLIENT_INTERVAL = 15  # seconds between /quotes polls from tabs without a stream (LIVE_POLL_MS)
+
+# Each open stream pins one worker thread under gthread. Past this many per worker, /stream answers
+# 503 and the browser polls /quotes instead, so Dash callbacks always keep threads. 0 = no cap
+# (only safe with an async worker class or a dedicated SSE process).
+MAX_STREAMS = int(os.environ.get("MAX_STREAMS_PER_WORKER", int(os.environ.get("GUNICORN_THREADS", 32)) // 2))
+_stream_slots = threading.BoundedSemaphore(MAX_STREAMS) if MAX_STREAMS > 0 else None
+
+def get_quote(ticker):
+    """ Latest price and day change for a ticker, or None if no data is available. """
+    data = get_history(ticker, period="2d")
+    if data.empty:
+        return None
+    price = data['Close'].iloc[-1]
+    change = data['Close'].diff().iloc[-1] if len(data) > 1 else 0.0
+    prev = data['Close'].iloc[-2] if len(data) > 1 else price
+    return {'price': round(float(price), 2), 'change': round(float(change), 2),
+            'change_pct': round(float(change / prev * 100), 2) if prev else 0.0}
+
+def _price(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+def parse_rules(raw):
+    """
+    Validates the client-supplied rules into {'auto_trades': {ticker: {'type', 'target'}},
+    'price_alerts': {ticker: {'upper', 'lower'}}} with float targets; malformed entries are dropped.
+    """
+    raw = raw if isinstance(raw, dict) else {}
+    trades, alerts = raw.get('auto_trades'), raw.get('price_alerts')
+    rules = {'auto_trades': {}, 'price_alerts': {}}
+    for ticker, trade in (trades.items() if isinstance(trades, dict) else ()):
+        if not isinstance(trade, dict):
+            continue
+        kind, target = str(trade.get('type', '')).upper(), _price(trade.get('target'))
+        if kind in ('BUY', 'SELL') and target is not None:
+            rules['auto_trades'][str(ticker).upper()] = {'type': kind, 'target': target}
+    for ticker, alert in (alerts.items() if isinstance(alerts, dict) else ()):
+        if not isinstance(alert, dict):
+            continue
+        upper, lower = _price(alert.get('upper')), _price(alert.get('lower'))
+        if upper is not None or lower is not None:
+            rules['price_alerts'][str(ticker).upper()] = {'upper': upper, 'lower': lower}
+    return rules
+
+def rule_fires(rules, ticker, price):
+    """ True when `price` crosses any auto-trade target or price alert the session set on `ticker`. """
+    trade = rules.get('auto_trades', {}).get(ticker)
+    if trade and ((trade['type'] == 'BUY' and price <= trade['target'])
+                  or (trade['type'] == 'SELL' and price >= trade['target'])):
+        return True
+    alert = rules.get('price_alerts', {}).get(ticker) or {}
+    return bool((alert.get('upper') and price >= alert['upper'])
+                or (alert.get('lower') and price <= alert['lower']))
+
+class _Subscriber:
+    def __init__(self, tickers, rules):
+        self.tickers, self.rules = tickers, rules
+        self.queue = queue.Queue()
+
+    def offer(self, quotes):
+        """ Queues the quote deltas this session cares about, plus a trigger for any crossed rule. """
+        mine = {t: q for t, q in quotes.items() if t in self.tickers}
+        if not mine:
+            return
+        self.queue.put(('quotes', mine))
+        fired = {t: q['price'] for t, q in mine.items() if rule_fires(self.rules, t, q['price'])}
+        if fired:
+            self.queue.put(('trigger', {'prices': fired, 'at': time.time()}))
+
+class QuoteHub:
+    """
+    One upstream poller per process fanning quote deltas out to every connected session.
+    Each ticker is fetched once per sweep no matter how many tabs watch it, and sessions
+    only hear about a ticker when its price actually changed. Every change bumps `version`,
+    so polling tabs can ask for just the quotes that changed since their last poll.
+    """
+    def __init__(self, poll_interval=POLL_INTERVAL, fetch_quote=get_quote, autostart=True):
+        self.poll_interval, self.fetch_quote, self.autostart = poll_interval, fetch_quote, autostart
+        self.quotes = {}
+        self.version = 0
+        self._versions = {}   # ticker -> version of its last change
+        self._polled = {}     # ticker -> when a polling tab last asked for it
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _ensure_running(self):
+        # Caller holds self._lock.
+        if self._thread is None and self.autostart:
+            self._thread = threading.Thread(target=self._run, name="quote-hub", daemon=True)
+            self._thread.start()
+
+    def subscribe(self, tickers, rules):
+        sub = _Subscriber(set(tickers), rules)
+        with self._lock:
+            self._subscribers.add(sub)
+            known = {t: self.quotes[t] for t in sub.tickers if t in self.quotes}
+            self._ensure_running()
+        self._deliver(sub, known)
+        self._wake.set()  # pick up newly watched tickers without waiting a full interval
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def changes_since(self, tickers, since):
+        """
+        Keeps `tickers` on the poller for a polling tab and returns ({ticker: quote} changed after
+        version `since`, current version). Tickers never fetched yet are fetched once here.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for ticker in tickers:
+                self._polled[ticker] = now
+            unknown = [t for t in tickers if t not in self.quotes]
+            self._ensure_running()
+        if unknown:
+            fresh = {}
+            for ticker in unknown:
+                try:
+                    quote = self.fetch_quote(ticker)
+                except Exception as e:
+                    print(f"Quote refresh for {ticker} failed: {e}")
+                    continue
+                if quote:
+                    fresh[ticker] = quote
+            self.publish(fresh)
+        with self._lock:
+            changed = {t: self.quotes[t] for t in tickers if self._versions.get(t, 0) > since}
+            return changed, self.version
+
+    def poll_once(self):
+        """ Fetches every watched ticker once and publishes the ones whose quote changed. """
+        with self._lock:
+            # Tickers polling tabs asked for recently stay on the sweep alongside streamed ones.
+            cutoff = time.monotonic() - 3 * POLL_CLIENT_INTERVAL
+            self._polled = {t: seen for t, seen in self._polled.items() if seen >= cutoff}
+            watched = set(self._polled).union(*(s.tickers for s in self._subscribers))
+        deltas = {}
+        for ticker in watched:
+            try:
+                quote = self.fetch_quote(ticker)
+            except Exception as e:
+                print(f"Quote refresh for {ticker} failed: {e}")
+                continue
+            if quote and quote != self.quotes.get(ticker):
+                deltas[ticker] = quote
+        self.publish(deltas)
+        return deltas
+
+    def publish(self, deltas):
+        """ Records changed quotes and fans them out to every subscribed session. """
+        if not deltas:
+            return
+        with self._lock:
+            self.quotes.update(deltas)
+            self.version += 1
+            self._versions.update(dict.fromkeys(deltas, self.version))
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            self._deliver(sub, deltas)
+
+    def _deliver(self, sub, quotes):
+        # One misbehaving subscriber must never take down the shared poller.
+        try:
+            sub.offer(quotes)
+        except Exception as e:
+            print(f"Dropping quote delivery to a subscriber: {e}")
+
+    def _run(self):
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Quote hub sweep failed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+hub = QuoteHub()
+
+def register_stream_route(server, path='/stream', poll_path='/quotes'):
+    """
+    Adds the server-sent events endpoint the browser's live_updates.js listens on, plus the
+    plain JSON endpoint it polls when every stream slot on the worker is taken.
+    """
+    def _parse_args():
+        tickers = [t for t in request.args.get('tickers', '').upper().split(',') if t]
+        try:
+            rules = parse_rules(json.loads(request.args.get('rules') or '{}'))
+        except ValueError:
+            rules = parse_rules({})
+        return tickers, rules
+
+    @server.route(path)
+    def stream_quotes():
+        tickers, rules = _parse_args()
+        if _stream_slots is not None and not _stream_slots.acquire(blocking=False):
+            return Response("Stream capacity reached; poll " + poll_path, status=503, headers={'Retry-After': '30'})
+
+        @stream_with_context
+        def events():
+            sub = hub.subscribe(tickers, rules)
+            try:
+                yield "retry: 5000\n\n"
+                while True:
+                    try:
+                        event, payload = sub.queue.get(timeout=HEARTBEAT_INTERVAL)
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+                        continue
+                    yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            finally:
+                hub.unsubscribe(sub)
+
+        response = Response(events(), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        if _stream_slots is not None:
+            response.call_on_close(_stream_slots.release)  # runs even if the client leaves before the first event
+        return response
+
+    @server.route(poll_path)
+    def poll_quotes():
+        # Served from the hub's shared sweep: only quotes changed since the tab's last `version`,
+        # and a trigger only for rules those changes cross, the same deltas a stream would get.
+        tickers, rules = _parse_args()
+        try:
+            since = int(request.args.get('since', 0))
+        except ValueError:
+            since = 0
+        quotes, version = hub.changes_since(tickers, since)
+        fired = {t: q['price'] for t, q in quotes.items() if rule_fires(rules, t, q['price'])}
+        return {'quotes': quotes, 'version': version,
+                'trigger': {'prices': fired, 'at': time.time()} if fired else None}
+
+    return stream_quotes
@@ -0,0 +1,163 @@
+# utils/screener.py
+import heapq
+import os
+import pandas as pd
+from utils.data_handler import format_screener_row
+from utils.governor import get_info
+from utils.history_store import download_history, frames_to_panel, load_history
+from utils.ml_model import train_and_predict_svr, generate_recommendation
+from utils.similarity import SimilarityIndex, diversify
+from utils.snapshot import load_latest_snapshot
+
+UNIVERSE_FILE = os.environ.get(
+    "STOCKSAARTHI_UNIVERSE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "universe.txt")
+)
+
+# Prefilter thresholds (stage 1). Volatility is the daily % std used by generate_recommendation.
+MIN_HISTORY_DAYS = 50
+VOLATILITY_BAND = (0.5, 4.0)
+MIN_TURNOVER = 5e7          # median daily traded value (₹) over the last 20 sessions
+MAX_CANDIDATES = 10         # how many survivors get the full SVR forecast (stage 2)
+TOP_K = 10
+
+class TopK:
+    """ Keeps the K highest-scoring items seen so far using a bounded min-heap. """
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._seq = 0  # tie-breaker so items themselves are never compared
+
+    def push(self, score, item):
+        entry = (score, self._seq, item)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def ranked(self):
+        """ Returns the kept items ordered from best to worst score. """
+        return [item for _, _, item in sorted(self._heap, key=lambda e: (-e[0], e[1]))]
+
+def load_universe(path=None):
+    """ Reads the screening universe (one ticker per line, '#' comments allowed). """
+    path = path or UNIVERSE_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            tickers = [line.split('#', 1)[0].strip().upper() for line in f]
+    except OSError as e:
+        print(f"Could not read universe file {path}: {e}")
+        return []
+    return list(dict.fromkeys(t for t in tickers if t))
+
+def fetch_universe_history(tickers, period="1y"):
+    """
+    OHLCV for the whole universe as a (field, ticker) panel. Reads the history store that
+    precompute.py keeps current and downloads only tickers it has never stored.
+    """
+    if not tickers:
+        return pd.DataFrame()
+    frames = {t: df for t in tickers if (df := load_history(t)) is not None and not df.empty}
+    missing = [t for t in tickers if t not in frames]
+    if missing:
+        print(f"No stored history for {len(missing)} tickers; downloading them.")
+        frames.update(download_history(missing, period=period))
+    return frames_to_panel(frames)
+
+def prefilter_universe(panel, max_candidates=MAX_CANDIDATES, volatility_band=VOLATILITY_BAND,
+                       min_turnover=MIN_TURNOVER):
+    """
+    Stage 1: cheap vectorized screen across every ticker at once.
+    Keeps names with a bullish SMA_10/SMA_50 crossover, volatility inside the band and
+    enough liquidity, ranked by crossover strength.
+    """
+    if panel.empty:
+        return pd.DataFrame()
+    close, volume = panel['Close'], panel['Volume']
+
+    sma_10 = close.rolling(window=10, min_periods=10).mean().iloc[-1]
+    sma_50 = close.rolling(window=50, min_periods=50).mean().iloc[-1]
+    volatility = close.pct_change(fill_method=None).std() * 100
+    turnover = (close * volume).tail(20).median()
+
+    stats = pd.DataFrame({
+        'history': close.notna().sum(),
+        'crossover': sma_10 / sma_50 - 1,
+        'volatility': volatility,
+        'turnover': turnover,
+    })
+    mask = (
+        (stats['history'] >= MIN_HISTORY_DAYS)
+        & (stats['crossover'] > 0)
+        & stats['volatility'].between(*volatility_band)
+        & (stats['turnover'] >= min_turnover)
+    )
+    survivors = stats[mask].sort_values('crossover', ascending=False)
+    return survivors.head(max_candidates) if max_candidates else survivors
+
+def company_name(ticker, names=None):
+    """
+    Display name for a ticker: from `names`, else the latest snapshot's name table (names don't
+    go stale, so any age will do), else one governed info lookup.
+    """
+    if names and ticker in names:
+        return names[ticker]
+    snapshot = load_latest_snapshot(max_age_hours=None) or {}
+    if ticker in snapshot.get('names', {}):
+        return snapshot['names'][ticker]
+    try:
+        return get_info(ticker).get('longName', ticker)
+    except Exception:
+        return ticker
+
+def rank_candidates(panel, candidates, top_k=TOP_K, forecasts=None, similarity=None, names=None):
+    """
+    Stage 2: forecasts each candidate (or reuses `forecasts[ticker] = (predictions_df,
+    recommendation)` when already fitted) and keeps the top K by expected 10-day return.
+    With a `similarity` index, picks that move too closely with a better-ranked pick are skipped.
+    Company names are only looked up for the final picks.
+    """
+    forecasts = forecasts or {}
+    best = TopK(len(candidates) if similarity is not None else top_k)
+    for ticker in candidates:
+        try:
+            stock_data = panel.xs(ticker, axis=1, level=1).dropna(subset=['Close'])
+            if ticker in forecasts:
+                predictions_df, recommendation = forecasts[ticker]
+            else:
+                predictions_df = train_and_predict_svr(stock_data, ticker=ticker)
+                recommendation = generate_recommendation(stock_data, predictions_df) if not predictions_df.empty else None
+            if predictions_df.empty:
+                continue
+            expected_return = predictions_df['Predicted_Close'].iloc[-1] / stock_data['Close'].iloc[-1] - 1
+            best.push(expected_return, (ticker, stock_data, recommendation, expected_return))
+        except Exception as e:
+            print(f"CRITICAL ERROR while screening {ticker}: {e}. Skipping.")
+            continue
+    picks = best.ranked()
+    if similarity is not None:
+        keep = set(diversify([pick[0] for pick in picks], similarity, top_k))
+        picks = [pick for pick in picks if pick[0] in keep]
+
+    rows = []
+    for ticker, stock_data, recommendation, expected_return in picks:
+        row = format_screener_row(ticker, {'longName': company_name(ticker, names)}, stock_data, recommendation)
+        row['Expected Return'] = f"{expected_return * 100:+.2f}%"
+        rows.append(row)
+    return rows
+
+def run_screener(tickers, top_k=TOP_K, max_candidates=MAX_CANDIDATES, period="1y"):
+    """
+    Two-stage screener: vectorized prefilter over the whole universe, then the full
+    SVR forecast only for the surviving candidates. Returns rows ranked by expected return,
+    diversified so no two picks are highly correlated.
+    """
+    panel = fetch_universe_history(tickers, period=period)
+    candidates = prefilter_universe(panel, max_candidates=max_candidates)
+    print(f"Prefilter kept {len(candidates)} of {len(tickers)} tickers.")
+    similarity = SimilarityIndex.from_panel(panel[[c for c in panel.columns if c[1] in set(candidates.index)]])
+    return rank_candidates(panel, candidates.index, top_k=top_k, similarity=similarity)
@@ -0,0 +1,215 @@
+# utils/similarity.py
+import os
+import threading
+import numpy as np
+import pandas as pd
+from utils.history_store import DATA_DIR
+
+INDEX_FILE = os.path.join(DATA_DIR, "similarity_index.npz")
+WINDOW = 120              # trading days of returns in each feature vector
+VOLATILITY_WEIGHT = 0.25  # distance penalty per unit of log-volatility difference
+APPROX_THRESHOLD = 20000  # exact scans stay ~1 ms below this; above it queries go through LSH
+LSH_BITS, LSH_TABLES = 8, 24  # re-ranks ~1/8 of the universe at ~75% recall@10
+MAX_PICK_CORRELATION = 0.85
+MAX_MISSING_DATES = 0.05  # share of the index's window a fallback query may forward-fill
+
+def _session_dates(index):
+    """ Tz-naive midnight timestamps, so daily bars from different sources line up by date. """
+    index = pd.DatetimeIndex(index)
+    return (index.tz_localize(None) if index.tz is not None else index).normalize()
+
+def return_features(closes):
+    """
+    Turns a (dates x tickers) close-price frame into unit-length z-scored return vectors
+    (so a dot product is the Pearson correlation) and daily return volatilities.
+    """
+    returns = closes.tail(WINDOW + 1).pct_change(fill_method=None).iloc[1:].fillna(0.0)
+    values = returns.to_numpy(dtype=np.float64).T
+    volatility = values.std(axis=1)
+    centered = values - values.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(centered, axis=1, keepdims=True)
+    vectors = np.divide(centered, norms, out=np.zeros_like(centered), where=norms > 0)
+    return vectors.astype(np.float32), volatility.astype(np.float32)
+
+class SimilarityIndex:
+    """
+    Normalized return/volatility vectors for the whole universe with top-k nearest
+    neighbour queries. Exact search is one matrix-vector product; large universes
+    switch to random-hyperplane LSH buckets with exact re-ranking of the candidates.
+    """
+    def __init__(self, tickers=(), vectors=None, volatility=None, as_of=None, dates=None):
+        self.tickers = list(tickers)
+        # The WINDOW + 1 session dates every vector's returns are computed over.
+        self.dates = pd.DatetimeIndex(dates if dates is not None else [])
+        self.vectors = vectors if vectors is not None else np.zeros((0, WINDOW), dtype=np.float32)
+        self.volatility = volatility if volatility is not None else np.zeros(0, dtype=np.float32)
+        self.as_of = dict(as_of or {})
+        self._rebuild_lookup()
+
+    def _rebuild_lookup(self):
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+        self._lsh = None
+
+    @classmethod
+    def from_panel(cls, panel):
+        index = cls()
+        index.update(panel)
+        return index
+
+    def update(self, panel):
+        """
+        Adds new tickers and recomputes only those whose history has a newer last bar; if the
+        panel's date window moved, every ticker in it is recomputed and tickers it no longer
+        covers are dropped, so all vectors share one window. Returns the count updated.
+        """
+        if panel.empty or len(panel) <= WINDOW:
+            return 0  # not enough history for a full window yet
+        closes = panel['Close'].tail(WINDOW + 1)
+        closes.index = _session_dates(closes.index)
+        last_dates = {t: closes[t].last_valid_index() for t in closes.columns}
+        if not closes.index.equals(self.dates):
+            stale = [t for t, d in last_dates.items() if d is not None]
+            self._keep(set(stale))
+            self.dates = closes.index
+        else:
+            stale = [t for t, d in last_dates.items() if d is not None and self.as_of.get(t) != str(d.date())]
+        if not stale:
+            return 0
+        vectors, volatility = return_features(closes[stale])
+        new = [t for t in stale if t not in self._pos]
+        known = [i for i, t in enumerate(stale) if t in self._pos]
+        rows = [self._pos[stale[i]] for i in known]
+        self.vectors[rows], self.volatility[rows] = vectors[known], volatility[known]
+        added = [i for i, t in enumerate(stale) if t not in self._pos]
+        self.tickers += new
+        self.vectors = np.vstack([self.vectors, vectors[added]])
+        self.volatility = np.concatenate([self.volatility, volatility[added]])
+        self.as_of.update({t: str(last_dates[t].date()) for t in stale})
+        self._rebuild_lookup()
+        return len(stale)
+
+    def _keep(self, tickers):
+        rows = [i for i, t in enumerate(self.tickers) if t in tickers]
+        self.tickers = [self.tickers[i] for i in rows]
+        self.vectors, self.volatility = self.vectors[rows], self.volatility[rows]
+        self.as_of = {t: d for t, d in self.as_of.items() if t in tickers}
+        self._rebuild_lookup()
+
+    def vector(self, ticker):
+        i = self._pos.get(ticker)
+        return None if i is None else (self.vectors[i], self.volatility[i])
+
+    def _hash(self, vectors):
+        # One LSH_BITS-bit signature per table from the signs of random projections.
+        bits = (np.einsum('nd,tbd->tnb', vectors, self._lsh['planes']) > 0).astype(np.int64)
+        return bits @ (1 << np.arange(LSH_BITS, dtype=np.int64))
+
+    def _candidates(self, vector):
+        if self._lsh is None:
+            planes = np.random.default_rng(0).standard_normal((LSH_TABLES, LSH_BITS, self.vectors.shape[1])).astype(np.float32)
+            self._lsh = {'planes': planes}
+            keys = self._hash(self.vectors)
+            self._lsh['buckets'] = [pd.Series(np.arange(len(self.tickers))).groupby(keys[t]).apply(np.array).to_dict()
+                                    for t in range(LSH_TABLES)]
+        query_keys = self._hash(vector[None, :])[:, 0]
+        found = [self._lsh['buckets'][t].get(key, np.empty(0, dtype=np.int64)) for t, key in enumerate(query_keys)]
+        return np.unique(np.concatenate(found)).astype(np.int64)
+
+    def query(self, vector, volatility, k=5, exclude=None, approximate=None):
+        """ Top-k most similar tickers to a feature vector as [(ticker, correlation, score)]. """
+        if not self.tickers:
+            return []
+        approximate = len(self.tickers) > APPROX_THRESHOLD if approximate is None else approximate
+        rows = self._candidates(vector) if approximate else np.arange(len(self.tickers))
+        if rows.size <= k:
+            rows = np.arange(len(self.tickers))  # buckets too sparse; fall back to the exact scan
+        if exclude in self._pos:
+            rows = rows[rows != self._pos[exclude]]
+        if rows.size == 0:
+            return []
+        correlation = self.vectors[rows] @ vector
+        log_vol_gap = np.abs(np.log1p(self.volatility[rows] * 100) - np.log1p(volatility * 100))
+        score = correlation - VOLATILITY_WEIGHT * log_vol_gap
+        top = np.argpartition(-score, min(k, rows.size) - 1)[:k]
+        top = top[np.argsort(-score[top])]
+        return [(self.tickers[rows[i]], float(correlation[i]), float(score[i])) for i in top]
+
+    def most_similar(self, ticker, k=5, approximate=None):
+        entry = self.vector(ticker)
+        return [] if entry is None else self.query(*entry, k=k, exclude=ticker, approximate=approximate)
+
+    def save(self, path=INDEX_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, tickers=np.array(self.tickers), vectors=self.vectors, volatility=self.volatility,
+                 as_of=np.array([self.as_of.get(t, '') for t in self.tickers]), dates=self.dates.to_numpy())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with np.load(path) as data:
+            tickers = [str(t) for t in data['tickers']]
+            return cls(tickers, data['vectors'], data['volatility'], dict(zip(tickers, (str(d) for d in data['as_of']))),
+                       data['dates'])
+
+_cache = {'mtime': None, 'index': None}
+_lock = threading.Lock()
+
+def load_similarity_index():
+    """ The persisted index (built by precompute.py), reloaded when the file changes; None if absent. """
+    with _lock:
+        try:
+            mtime = os.path.getmtime(INDEX_FILE)
+            if mtime != _cache['mtime']:
+                _cache['index'], _cache['mtime'] = SimilarityIndex.load(INDEX_FILE), mtime
+        except (OSError, ValueError, KeyError):
+            return None
+        return _cache['index']
+
+def refresh_similarity_index(panel):
+    """ Incrementally updates the persisted index from a history panel and saves it. """
+    try:
+        index = SimilarityIndex.load(INDEX_FILE)
+    except (OSError, ValueError, KeyError):
+        index = SimilarityIndex()
+    updated = index.update(panel)
+    if updated:
+        index.save(INDEX_FILE)
+    return index, updated
+
+def find_similar_stocks(ticker, stock_data=None, k=5):
+    """
+    Top-k similar tickers for the dashboard. Falls back to computing the ticker's own vector
+    from `stock_data` when it is not in the index yet, over the index's own date window so
+    returns line up by date. Returns [] when no index has been built or the dates don't cover it.
+    """
+    index = load_similarity_index()
+    if index is None:
+        return []
+    if index.vector(ticker) is not None:
+        return index.most_similar(ticker, k=k)
+    if stock_data is None or stock_data.empty or len(index.dates) != WINDOW + 1:
+        return []
+    closes = pd.Series(stock_data['Close'].to_numpy(), index=_session_dates(stock_data.index))
+    closes = closes[~closes.index.duplicated(keep='last')].reindex(index.dates)
+    if closes.isna().mean() > MAX_MISSING_DATES:
+        return []
+    vectors, volatility = return_features(closes.ffill().to_frame(ticker))
+    return index.query(vectors[0], volatility[0], k=k, exclude=ticker)
+
+def diversify(ranked_tickers, index, limit, max_correlation=MAX_PICK_CORRELATION):
+    """
+    Greedily keeps tickers in rank order, skipping any whose returns correlate above
+    `max_correlation` with a pick already kept. Tickers missing from the index are kept.
+    """
+    picks, kept_vectors = [], []
+    for ticker in ranked_tickers:
+        entry = index.vector(ticker)
+        if entry is not None and kept_vectors and float(np.max(np.stack(kept_vectors) @ entry[0])) > max_correlation:
+            continue
+        picks.append(ticker)
+        if entry is not None:
+            kept_vectors.append(entry[0])
+        if len(picks) == limit:
+            break
+    return picks
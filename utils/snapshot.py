@@ -0,0 +1,66 @@
+# utils/snapshot.py
+import json
+import os
+import pandas as pd
+from utils.history_store import DATA_DIR
+
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+LATEST_POINTER = os.path.join(SNAPSHOT_DIR, "LATEST")
+SNAPSHOT_MAX_AGE_HOURS = float(os.environ.get("SNAPSHOT_MAX_AGE_HOURS", 24))
+SNAPSHOTS_TO_KEEP = 5
+
+_cache = {'path': None, 'data': None}
+
+def write_snapshot(payload, keep=SNAPSHOTS_TO_KEEP):
+    """
+    Writes a new versioned snapshot and points LATEST at it. Older versions beyond
+    `keep` are pruned. Returns the path of the snapshot written.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    generated_at = pd.Timestamp.now()
+    version = generated_at.strftime("%Y%m%dT%H%M%S")
+    payload = {'version': version, 'generated_at': generated_at.isoformat(), **payload}
+
+    path = os.path.join(SNAPSHOT_DIR, f"snapshot-{version}.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(f"{path}.tmp", path)
+    with open(f"{LATEST_POINTER}.tmp", "w", encoding="utf-8") as f:
+        f.write(os.path.basename(path))
+    os.replace(f"{LATEST_POINTER}.tmp", LATEST_POINTER)
+
+    versions = sorted(n for n in os.listdir(SNAPSHOT_DIR) if n.startswith("snapshot-") and n.endswith(".json"))
+    for name in versions[:-keep]:
+        os.remove(os.path.join(SNAPSHOT_DIR, name))
+    return path
+
+def load_latest_snapshot(max_age_hours=SNAPSHOT_MAX_AGE_HOURS):
+    """ Returns the latest snapshot if one exists and is fresh enough (any age when max_age_hours is None), else None. """
+    try:
+        with open(LATEST_POINTER, encoding="utf-8") as f:
+            path = os.path.join(SNAPSHOT_DIR, f.read().strip())
+        if _cache['path'] != path:
+            with open(path, encoding="utf-8") as f:
+                _cache['data'], _cache['path'] = json.load(f), path
+    except (OSError, ValueError):
+        return None
+
+    snapshot = _cache['data']
+    age = pd.Timestamp.now() - pd.Timestamp(snapshot['generated_at'])
+    if max_age_hours is not None and age > pd.Timedelta(hours=max_age_hours):
+        return None
+    return snapshot
+
+def get_snapshot_recommendation(ticker):
+    """
+    Looks up a precomputed recommendation and forecast for a ticker.
+    Returns (recommendation, predictions_df) or (None, None) when the snapshot has no entry.
+    """
+    snapshot = load_latest_snapshot()
+    entry = (snapshot or {}).get('recommendations', {}).get(ticker)
+    if not entry:
+        return None, None
+    predictions_df = pd.DataFrame(entry.get('forecast', []), columns=['Date', 'Predicted_Close'])
+    predictions_df['Date'] = pd.to_datetime(predictions_df['Date'])
+    reco = {k: entry[k] for k in ('recommendation', 'risk', 'target_price')}
+    return reco, predictions_df
@@ -0,0 +1,197 @@
+# utils/svr_search.py
+import contextlib
+import json
+import math
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import KFold, RandomizedSearchCV
+from sklearn.svm import SVR
+from utils.history_store import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to merge-before-replace without a cross-process lock
+    fcntl = None
+
+PARAM_GRID = {'C': [1, 10, 100, 1000], 'gamma': [float(g) for g in np.logspace(-2, 2, 5)], 'epsilon': [0.01, 0.1, 0.5]}
+CV_FOLDS = 3
+HALVING_FACTOR = 3
+
+# 'adaptive' (warm starts + successive halving) or 'random' (the original 10-draw RandomizedSearchCV).
+SEARCH_STRATEGY = os.environ.get("SVR_SEARCH", "adaptive")
+PARAMS_TTL_HOURS = float(os.environ.get("SVR_PARAMS_TTL_HOURS", 24))  # reuse a ticker's params without searching
+PARAMS_FILE = os.path.join(DATA_DIR, "svr_params.json")
+REGIME_WINNERS = 5
+COLD_SEEDS = 3        # regime winners whose neighbourhoods seed a never-seen ticker's search
+
+def cpu_budget():
+    """ Cores this process may spend on model fitting: SVR_CPU_BUDGET, else the machine split across gunicorn workers. """
+    if os.environ.get("SVR_CPU_BUDGET"):
+        return max(1, int(os.environ["SVR_CPU_BUDGET"]))
+    return max(1, (os.cpu_count() or 1) // max(1, int(os.environ.get("WEB_CONCURRENCY", 1))))
+
+N_JOBS = max(1, min(int(os.environ.get("SVR_N_JOBS", 1)), cpu_budget()))  # joblib workers per fit
+_fit_slots = threading.BoundedSemaphore(max(1, cpu_budget() // N_JOBS))   # concurrent fits per process
+
+def volatility_regime(y):
+    """ Buckets a price series with the same daily-volatility thresholds generate_recommendation uses. """
+    volatility = pd.Series(y).pct_change().dropna().std() * 100
+    if volatility < 1.5: return "Low"
+    if volatility > 3.5: return "High"
+    return "Medium"
+
+class ParamStore:
+    """
+    Best SVR parameters per ticker, plus recent winners per volatility regime so similar
+    tickers can seed each other. Persisted to JSON and reloaded when another process
+    (e.g. the precompute job) rewrites it.
+    """
+    def __init__(self, path=PARAMS_FILE):
+        self.path = path
+        self._data, self._mtime = {'tickers': {}, 'regimes': {}}, None
+        self._lock = threading.Lock()
+
+    def _reload(self, force=False):
+        try:
+            mtime = os.path.getmtime(self.path)
+            if force or mtime != self._mtime:
+                with open(self.path, encoding="utf-8") as f:
+                    self._data, self._mtime = json.load(f), mtime
+        except (OSError, ValueError):
+            pass
+
+    def ticker_entry(self, ticker):
+        with self._lock:
+            self._reload()
+            return self._data['tickers'].get(ticker)
+
+    def regime_winners(self, regime):
+        with self._lock:
+            self._reload()
+            return list(self._data['regimes'].get(regime, []))
+
+    def record(self, ticker, regime, params, score):
+        """
+        Adds a result and persists it. Web workers and the precompute job share the file, so under
+        a cross-process lock the latest version on disk is merged in right before a per-process
+        temp file replaces it.
+        """
+        with self._lock, self._file_lock():
+            self._reload(force=True)
+            if ticker:
+                self._data['tickers'][ticker] = {'params': params, 'score': score, 'regime': regime,
+                                                 'updated': pd.Timestamp.now().isoformat()}
+            winners = [p for p in self._data['regimes'].get(regime, []) if p != params]
+            self._data['regimes'][regime] = ([params] + winners)[:REGIME_WINNERS]
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                                                dir=os.path.dirname(self.path))
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f)
+                os.replace(tmp_path, self.path)
+                self._mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                print(f"Could not persist SVR parameters: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """ Serializes read-merge-replace across processes via an advisory lock on a sidecar file. """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            lock = open(f"{self.path}.lock", "a")
+        except OSError:
+            lock = None
+        if fcntl is None or lock is None:
+            if lock is not None:
+                lock.close()
+            yield
+            return
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+param_store = ParamStore()
+
+def _grid_neighbors(params):
+    """ The given point plus one step up and down along each axis of PARAM_GRID. """
+    candidates = [params]
+    for key, values in PARAM_GRID.items():
+        idx = min(range(len(values)), key=lambda i: abs(math.log(values[i]) - math.log(params[key])))
+        for step in (-1, 1):
+            if 0 <= idx + step < len(values):
+                candidates.append({**params, key: values[idx + step]})
+    return candidates
+
+def _full_grid():
+    return [{'C': c, 'gamma': g, 'epsilon': e} for c in PARAM_GRID['C'] for g in PARAM_GRID['gamma'] for e in PARAM_GRID['epsilon']]
+
+def _fold_mse(params, X, y, train, test):
+    model = SVR(kernel='rbf', **params).fit(X[train], y[train])
+    return mean_squared_error(y[test], model.predict(X[test]))
+
+def successive_halving(X, y, candidates, cv=CV_FOLDS, factor=HALVING_FACTOR, n_jobs=N_JOBS):
+    """
+    Successive halving with CV folds as the budget: every candidate is scored on the first
+    fold, only the best 1/factor go on to the next fold, and so on. Folds stay contiguous
+    in time, unlike row subsampling. Returns (best_params, mean CV MSE of the winner).
+    """
+    folds = list(KFold(n_splits=cv).split(X))
+    scores = {i: [] for i in range(len(candidates))}
+    alive = list(range(len(candidates)))
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for k, (train, test) in enumerate(folds):
+            results = parallel(delayed(_fold_mse)(candidates[i], X, y, train, test) for i in alive)
+            for i, mse in zip(alive, results):
+                scores[i].append(mse)
+            if k < len(folds) - 1:
+                alive = sorted(alive, key=lambda i: np.mean(scores[i]))[:max(1, math.ceil(len(alive) / factor))]
+    best = min(alive, key=lambda i: np.mean(scores[i]))
+    return candidates[best], float(np.mean(scores[best]))
+
+def fit_best_svr(X, y, ticker=None):
+    """
+    Fits an RBF SVR with tuned hyperparameters.
+    Adaptive strategy, cheapest first:
+      1. the ticker's own parameters are fresh -> refit them, no search;
+      2. the ticker has older parameters       -> search their grid neighbourhood plus the recent
+                                                  winners of tickers in the same volatility regime;
+      3. never seen, regime has winners        -> search the top regime winners and their grid neighbourhoods;
+      4. nothing known at all                  -> successive halving over the full grid.
+    Fits are capped by the per-process CPU budget so concurrent requests can't oversubscribe the host.
+    """
+    with _fit_slots:
+        if SEARCH_STRATEGY == "random":
+            search = RandomizedSearchCV(SVR(kernel='rbf'), PARAM_GRID, n_iter=10, cv=CV_FOLDS,
+                                        scoring='neg_mean_squared_error', n_jobs=N_JOBS, random_state=42)
+            search.fit(X, y)
+            return search.best_estimator_
+
+        regime = volatility_regime(y)
+        entry = param_store.ticker_entry(ticker) if ticker else None
+        if entry and pd.Timestamp.now() - pd.Timestamp(entry['updated']) < pd.Timedelta(hours=PARAMS_TTL_HOURS):
+            return SVR(kernel='rbf', **entry['params']).fit(X, y)
+
+        winners = param_store.regime_winners(regime)
+        if entry:
+            candidates = _grid_neighbors(entry['params'])
+            candidates += [p for p in winners if p not in candidates]
+        elif winners:
+            candidates = []
+            for seed in winners[:COLD_SEEDS]:
+                candidates += [p for p in _grid_neighbors(seed) if p not in candidates]
+        else:
+            candidates = _full_grid()
+        params, mse = successive_halving(X, y, candidates)
+        param_store.record(ticker, regime, params, mse)
+        return SVR(kernel='rbf', **params).fit(X, y)